@@ -4,25 +4,97 @@ Main application that provides chat UI and integrates with file reading tools
 """
 import os
 import json
-from typing import List, Dict, Any
+import time
+import uuid
+import asyncio
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
 import chainlit as cl
-from openai import AsyncOpenAI
 from dotenv import load_dotenv
-import mcp_tools
 
-# Load environment variables
+# Load environment variables (before mcp_tools reads its settings)
 load_dotenv()
 
-# Initialize OpenAI client (compatible with any OpenAI-compatible API)
-client = AsyncOpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"),
-    base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
-)
-
-# Model settings
-MODEL = os.getenv("MODEL_NAME", "gpt-4")
+import history
+import mcp_tools
+import metrics
+import read_dedup
+import result_store
+from llm_gateway import LLMBusyError, LLMGateway
+from streaming import StreamCoalescer
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+# LLM gateway (compatible with any OpenAI-compatible API) and its clients,
+# created on first use so that importing openai and opening the connection
+# pool stay out of worker start-up. Assigning a client here overrides it.
+_gateway: Optional[LLMGateway] = None
+client: Optional["AsyncOpenAI"] = None
+router_client: Optional["AsyncOpenAI"] = None
+
+# Model settings (MODEL is the answer tier, which writes the final answer)
+MODEL = os.getenv("ANSWER_MODEL_NAME") or os.getenv("MODEL_NAME", "gpt-4")
 MAX_TOKENS = int(os.getenv("MAX_TOKENS", "2000"))
 TEMPERATURE = float(os.getenv("TEMPERATURE", "0.7"))
+MAX_TOOL_ROUNDS = int(os.getenv("MAX_TOOL_ROUNDS", "5"))
+SPECULATIVE_TOOLS = os.getenv("SPECULATIVE_TOOLS", "true").lower() in ("1", "true", "yes")
+
+# Router tier: a fast model that picks tools in the rounds before the final
+# answer (disabled unless ROUTER_MODEL_NAME is set)
+ROUTER_MODEL = os.getenv("ROUTER_MODEL_NAME", "")
+ROUTER_MAX_TOKENS = int(os.getenv("ROUTER_MAX_TOKENS", "512"))
+
+
+def get_gateway() -> LLMGateway:
+    """
+    Get the LLM gateway, creating it on first use.
+
+    All sessions share its connection pool and in-flight limit.
+    """
+    global _gateway
+    if _gateway is None:
+        _gateway = LLMGateway(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+        )
+    return _gateway
+
+
+def get_client(tier: str = "answer") -> "AsyncOpenAI":
+    """
+    Get the client of a model tier, creating it on first use.
+
+    Args:
+        tier: "answer", or "router" (the answer client unless
+            ROUTER_BASE_URL is set)
+
+    Returns:
+        The tier's client, sharing the gateway's connection pool
+    """
+    global client, router_client
+    if client is None:
+        client = get_gateway().client
+    if tier != "router":
+        return client
+    if router_client is None:
+        router_client = get_gateway().client_for(
+            api_key=os.getenv("ROUTER_API_KEY") or os.getenv("OPENAI_API_KEY"),
+            base_url=os.getenv("ROUTER_BASE_URL")
+        ) if os.getenv("ROUTER_BASE_URL") else client
+    return router_client
+
+
+@cl.on_app_startup
+async def startup():
+    """Serve Prometheus metrics (see METRICS_PORT)"""
+    metrics.start_metrics_server()
+
+
+@cl.on_app_shutdown
+async def shutdown():
+    """Close the LLM gateway's pooled connections, if it was ever created"""
+    if _gateway is not None:
+        await get_gateway().close()
 
 
 @cl.on_chat_start
@@ -39,6 +111,15 @@ async def start():
     # Store message history in session
     cl.user_session.set("message_history", [])
 
+    # LLM streams and tool calls currently running for this session
+    cl.user_session.set("active_tasks", set())
+
+    # Large tool results referenced by this session's history (see result_store)
+    cl.user_session.set("result_refs", set())
+
+    # File reads already in this session's context (see read_dedup)
+    cl.user_session.set("read_tracker", read_dedup.ReadTracker())
+
     # Get available tools
     tools = mcp_tools.get_tools_for_llm()
     cl.user_session.set("tools", tools)
@@ -50,6 +131,277 @@ async def start():
     ).send()
 
 
+def _accumulate_tool_call(tool_calls: Dict[int, Dict[str, Any]], delta_call: Any) -> int:
+    """
+    Merge one streamed tool-call delta into the calls collected so far.
+
+    Deltas are grouped by their ``index``; providers that omit the index are
+    matched by ``id`` and otherwise continue the most recent call.
+
+    Args:
+        tool_calls: Calls collected so far, keyed by stream index
+        delta_call: A ``tool_calls`` entry from a streamed delta
+
+    Returns:
+        The index of the call the delta belongs to
+    """
+    index = getattr(delta_call, "index", None)
+    if index is None:
+        index = next(
+            (i for i, call in tool_calls.items() if delta_call.id and call["id"] == delta_call.id),
+            None
+        )
+        if index is None:
+            if delta_call.id or not tool_calls:
+                index = len(tool_calls)
+            else:
+                index = max(tool_calls)
+
+    call = tool_calls.setdefault(index, {
+        "id": None,
+        "type": "function",
+        "function": {"name": "", "arguments": ""}
+    })
+
+    if delta_call.id:
+        call["id"] = delta_call.id
+    if delta_call.function:
+        if delta_call.function.name:
+            call["function"]["name"] = delta_call.function.name
+        if delta_call.function.arguments:
+            call["function"]["arguments"] += delta_call.function.arguments
+    return index
+
+
+def _invalid_tool_call(tool_calls: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Check the router's tool calls before trusting them.
+
+    Args:
+        tool_calls: Tool calls returned by the router model
+        tools: Tool definitions offered in the round
+
+    Returns:
+        "unknown_tool" or "invalid_json" for the first bad call, or None if
+        all calls are usable
+    """
+    offered = {tool["function"]["name"] for tool in tools}
+    for call in tool_calls:
+        if call["function"]["name"] not in offered:
+            return "unknown_tool"
+        raw = call["function"]["arguments"]
+        try:
+            arguments = json.loads(raw) if raw.strip() else {}
+        except json.JSONDecodeError:
+            return "invalid_json"
+        if not isinstance(arguments, dict):
+            return "invalid_json"
+    return None
+
+
+def _complete_arguments(call: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Get a streamed call's arguments if they already form a complete JSON object.
+
+    A JSON object cannot be extended once it parses, so a call whose
+    arguments parse is complete even while the stream goes on.
+
+    Args:
+        call: Tool call collected so far
+
+    Returns:
+        The parsed arguments, or None while they are still incomplete
+    """
+    raw = call["function"]["arguments"]
+    if not call["function"]["name"] or not raw.rstrip().endswith("}"):
+        return None
+    try:
+        arguments = json.loads(raw)
+    except json.JSONDecodeError:
+        return None
+    return arguments if isinstance(arguments, dict) else None
+
+
+async def stream_completion(
+    message_history: List[Dict],
+    tools: List[Dict[str, Any]],
+    msg: Optional[cl.Message],
+    session_id: str = "default",
+    speculate: bool = False,
+    tier: str = "answer"
+) -> Tuple[str, List[Dict[str, Any]], Dict[str, asyncio.Task]]:
+    """
+    Run one streamed completion, forwarding content tokens to the UI.
+
+    Tokens are coalesced into batches (see STREAM_FLUSH_INTERVAL_MS) and
+    the buffer is always flushed before returning, so nothing is left
+    behind when tool messages follow. The request holds a gateway slot
+    until its stream ends; cancelling the call closes the upstream stream.
+
+    With `speculate`, each tool call is started on the tool runtime as soon
+    as its arguments form a complete JSON object, overlapping the tool with
+    the rest of the stream. Started calls that do not match the final calls
+    (or all of them, if the stream fails) are cancelled.
+
+    Args:
+        message_history: Messages to send to the LLM
+        tools: Tool definitions to offer (empty to disable tool calling)
+        msg: Chainlit message that receives the streamed content (None to
+            collect the content without streaming it)
+        session_id: Chat session used for fair queuing in the gateway
+        speculate: Start tool calls while the stream is still running
+        tier: "answer" for MODEL, or "router" for ROUTER_MODEL (which stops
+            at its first content token unless it is calling tools)
+
+    Returns:
+        The streamed text content, the tool calls requested by the model in
+        the order the model emitted them, and the already started tool
+        tasks keyed by tool call id
+    """
+    content = ""
+    tool_calls: Dict[int, Dict[str, Any]] = {}
+    stream = StreamCoalescer(msg) if msg is not None else None
+    if tier == "router":
+        model, max_tokens = ROUTER_MODEL, ROUTER_MAX_TOKENS
+    else:
+        model, max_tokens = MODEL, MAX_TOKENS
+    tier_client = get_client(tier)
+    # Speculatively started calls: index -> (name, normalized arguments, task)
+    early_calls: Dict[int, Tuple[str, str, asyncio.Task]] = {}
+
+    def start_if_complete(index: int) -> None:
+        call = tool_calls[index]
+        name = call["function"]["name"]
+        if index in early_calls or not mcp_tools.TOOLS.get(name, {}).get("speculative", True):
+            return
+        arguments = _complete_arguments(call)
+        if arguments is None:
+            return
+        snapshot = {**call, "function": {**call["function"]}}
+        early_calls[index] = (name, json.dumps(arguments, ensure_ascii=False), asyncio.create_task(execute_tool_call(snapshot)))
+
+    async with get_gateway().slot(session_id):
+        started = time.perf_counter()
+        opened = first_delta = None
+        response = None
+        error_class = None
+        try:
+            response = await tier_client.chat.completions.create(
+                model=model,
+                messages=message_history,
+                tools=tools if tools else None,
+                temperature=TEMPERATURE,
+                max_tokens=max_tokens,
+                stream=True
+            )
+            opened = time.perf_counter()
+
+            async for chunk in response:
+                if not chunk.choices:
+                    continue
+
+                delta = chunk.choices[0].delta
+                if first_delta is None and (delta.content or delta.tool_calls):
+                    first_delta = time.perf_counter()
+
+                # Handle content streaming
+                if delta.content:
+                    content += delta.content
+                    if stream is not None:
+                        await stream.push(delta.content)
+                    if tier == "router" and not tool_calls:
+                        # The router is answering instead of picking tools:
+                        # stop it and leave the answer to the answer model
+                        await response.close()
+                        break
+
+                # Handle tool calls (possibly several in parallel)
+                if delta.tool_calls:
+                    for tool_call in delta.tool_calls:
+                        index = _accumulate_tool_call(tool_calls, tool_call)
+                        if speculate:
+                            start_if_complete(index)
+        except BaseException as e:
+            error_class = type(e).__name__
+            for _, _, task in early_calls.values():
+                task.cancel()
+            # Stop upstream generation when the request is abandoned
+            if response is not None:
+                await response.close()
+            raise
+        finally:
+            ended = time.perf_counter()
+            if stream is not None:
+                await stream.flush()
+            metrics.record_llm_call(
+                model,
+                request_seconds=opened - started if opened else None,
+                ttft_seconds=first_delta - started if first_delta else None,
+                stream_seconds=ended - first_delta if first_delta else None,
+                tokens_in=history.estimate_prompt_tokens(message_history),
+                tokens_out=history.estimate_tokens(content) + sum(
+                    history.estimate_tokens(call["function"]["arguments"])
+                    for call in tool_calls.values()
+                ),
+                error_class=error_class,
+                tier=tier
+            )
+
+    calls = []
+    for index in sorted(tool_calls):
+        call = tool_calls[index]
+        if not call["function"]["name"]:
+            continue
+        if not call["id"]:
+            call["id"] = f"call_{uuid.uuid4().hex[:24]}"
+        calls.append(call)
+
+    # Keep speculative results only for calls that ended up unchanged
+    early_results: Dict[str, asyncio.Task] = {}
+    for index, (name, arguments, task) in early_calls.items():
+        call = tool_calls[index]
+        final_arguments = json.dumps(_parse_arguments(call["function"]["arguments"]), ensure_ascii=False)
+        if call["function"]["name"] == name and final_arguments == arguments:
+            early_results[call["id"]] = task
+        else:
+            task.cancel()
+
+    return content, calls, early_results
+
+
+def _parse_arguments(raw_arguments: str) -> Dict[str, Any]:
+    """Parse tool-call arguments, falling back to an empty dict on bad JSON"""
+    try:
+        arguments = json.loads(raw_arguments) if raw_arguments else {}
+    except json.JSONDecodeError:
+        return {}
+    return arguments if isinstance(arguments, dict) else {}
+
+
+async def execute_tool_call(tool_call: Dict[str, Any]) -> str:
+    """
+    Execute a single tool call on the async tool runtime.
+
+    Args:
+        tool_call: Tool call in OpenAI message format
+
+    Returns:
+        The result from the tool execution
+    """
+    arguments = _parse_arguments(tool_call["function"]["arguments"])
+    return await mcp_tools.acall_tool(tool_call["function"]["name"], arguments)
+
+
+async def _run_tracked(coroutine, active_tasks: set):
+    """Run a coroutine as a task tracked in active_tasks, so a disconnect cancels it"""
+    task = asyncio.create_task(coroutine)
+    active_tasks.add(task)
+    try:
+        return await task
+    finally:
+        active_tasks.discard(task)
+
+
 @cl.on_message
 async def main(message: cl.Message):
     """Handle incoming messages"""
@@ -57,6 +409,11 @@ async def main(message: cl.Message):
     # Get message history and tools
     message_history: List[Dict] = cl.user_session.get("message_history", [])
     tools = cl.user_session.get("tools", [])
+    active_tasks = cl.user_session.get("active_tasks", set())
+    result_refs = cl.user_session.get("result_refs", set())
+    read_tracker = cl.user_session.get("read_tracker") or read_dedup.ReadTracker()
+    read_tracker.new_turn()
+    session_id = cl.user_session.get("id") or "default"
 
     # Add user message to history
     message_history.append({
@@ -68,122 +425,152 @@ async def main(message: cl.Message):
     msg = cl.Message(content="")
     await msg.send()
 
-    # Call LLM with tools
+    turn_started = time.perf_counter()
+    rounds = 0
+    error_class = None
     try:
-        response = await client.chat.completions.create(
-            model=MODEL,
-            messages=message_history,
-            tools=tools if tools else None,
-            temperature=TEMPERATURE,
-            max_tokens=MAX_TOKENS,
-            stream=True
-        )
-
-        function_name = None
-        function_args = ""
-        content = ""
-
-        async for chunk in response:
-            if not chunk.choices:
-                continue
-
-            delta = chunk.choices[0].delta
-
-            # Handle content streaming
-            if delta.content:
-                content += delta.content
-                await msg.stream_token(delta.content)
+        # Agent loop: keep calling tools until the model answers directly.
+        # The last round is made without tools so the model must answer.
+        for round_index in range(MAX_TOOL_ROUNDS + 1):
+            rounds = round_index + 1
+            round_tools = tools if round_index < MAX_TOOL_ROUNDS else []
+
+            # Keep the prompt within the history token budget
+            compacted = history.compact_history(message_history)
+            if compacted is not message_history:
+                # Free stored results that compaction stubbed or dropped
+                await asyncio.to_thread(
+                    result_store.release_unreferenced,
+                    compacted, result_refs, read_tracker.live_digests(compacted)
+                )
+            message_history = compacted
+
+            # Send repeated reads as notes or diffs, and load spilled tool
+            # results back from disk for this prompt only
+            prompt, saved_tokens = read_dedup.restore(message_history)
+            prompt = await asyncio.to_thread(result_store.resolve, prompt)
+            read_tracker.record_savings(saved_tokens)
+            metrics.PROMPT_TOKENS_SAVED.inc(saved_tokens)
+            print(
+                f"Prompt size: ~{history.estimate_prompt_tokens(message_history)} tokens, "
+                f"{len(message_history)} messages (round {round_index + 1}), "
+                f"~{saved_tokens} tokens saved by deduplicated reads "
+                f"(~{read_tracker.saved_tokens} this session)"
+            )
 
-            # Handle tool calls
-            if delta.tool_calls:
-                for tool_call in delta.tool_calls:
-                    if tool_call.function.name:
-                        function_name = tool_call.function.name
-                    if tool_call.function.arguments:
-                        function_args += tool_call.function.arguments
+            # With a router model, rounds that may call tools go to the
+            # router first; its output is not streamed to the UI
+            tier = "router" if ROUTER_MODEL and round_tools else "answer"
+            content, tool_calls, early_results = await _run_tracked(stream_completion(
+                prompt, round_tools, msg if tier == "answer" else None, session_id,
+                speculate=SPECULATIVE_TOOLS, tier=tier
+            ), active_tasks)
+
+            if tier == "router":
+                # The answer model takes over rounds where the router starts
+                # answering (the final answer) or gets its tool calls wrong
+                problem = _invalid_tool_call(tool_calls, round_tools)
+                if problem or not tool_calls:
+                    for task in early_results.values():
+                        task.cancel()
+                    if problem:
+                        metrics.LLM_ESCALATIONS.inc(reason=problem)
+                        print(f"Escalating round {round_index + 1} to {MODEL}: {problem}")
+                    content, tool_calls, early_results = await _run_tracked(stream_completion(
+                        prompt, round_tools, msg, session_id,
+                        speculate=SPECULATIVE_TOOLS
+                    ), active_tasks)
+                elif content:
+                    msg.content = content
+
+            if not tool_calls:
+                # No tool call, just add assistant response to history
+                message_history.append({
+                    "role": "assistant",
+                    "content": content
+                })
+                await msg.update()
+                break
 
-        # If there was a tool call, execute it
-        if function_name:
             await msg.update()
 
-            # Parse arguments
-            try:
-                arguments = json.loads(function_args)
-            except json.JSONDecodeError:
-                arguments = {}
-
-            # Show tool call to user
-            await cl.Message(
-                content=f"🔧 도구 호출: `{function_name}`\n인자: `{json.dumps(arguments, ensure_ascii=False)}`"
-            ).send()
-
-            # Call the tool
-            tool_result = mcp_tools.call_tool(function_name, arguments)
-
-            # Show tool result
-            result_msg = cl.Message(content="")
-            await result_msg.send()
-
-            # Add tool call and result to message history
-            message_history.append({
-                "role": "assistant",
-                "content": None,
-                "tool_calls": [{
-                    "id": "call_1",
-                    "type": "function",
-                    "function": {
-                        "name": function_name,
-                        "arguments": json.dumps(arguments)
-                    }
-                }]
-            })
-
-            message_history.append({
-                "role": "tool",
-                "tool_call_id": "call_1",
-                "content": tool_result
-            })
-
-            # Get final response from LLM with tool result
-            final_response = await client.chat.completions.create(
-                model=MODEL,
-                messages=message_history,
-                temperature=TEMPERATURE,
-                max_tokens=MAX_TOKENS,
-                stream=True
-            )
-
-            final_content = ""
-            async for chunk in final_response:
-                if chunk.choices and chunk.choices[0].delta.content:
-                    token = chunk.choices[0].delta.content
-                    final_content += token
-                    await result_msg.stream_token(token)
+            # Normalize arguments so the history always holds valid JSON
+            for tool_call in tool_calls:
+                arguments = _parse_arguments(tool_call["function"]["arguments"])
+                tool_call["function"]["arguments"] = json.dumps(arguments, ensure_ascii=False)
 
-            # Add final response to history
+            # Add tool calls to message history
             message_history.append({
                 "role": "assistant",
-                "content": final_content
+                "content": content or None,
+                "tool_calls": tool_calls
             })
 
-            await result_msg.update()
-
-        else:
-            # No tool call, just add assistant response to history
-            message_history.append({
-                "role": "assistant",
-                "content": content
-            })
-            await msg.update()
+            # Show tool calls to user
+            for tool_call in tool_calls:
+                await cl.Message(
+                    content=f"🔧 도구 호출: `{tool_call['function']['name']}`\n"
+                            f"인자: `{tool_call['function']['arguments']}`"
+                ).send()
+
+            # Run all tool calls of this turn concurrently (reusing the ones
+            # started during the stream), tracked so that they can be
+            # cancelled when the session ends
+            tool_tasks = [
+                early_results.get(tool_call["id"])
+                or asyncio.create_task(execute_tool_call(tool_call))
+                for tool_call in tool_calls
+            ]
+            active_tasks.update(tool_tasks)
+            try:
+                tool_results = await asyncio.gather(*tool_tasks)
+            finally:
+                active_tasks.difference_update(tool_tasks)
+
+            # Add one tool result per call to message history. Repeated
+            # reads become notes or diffs, and large results are kept on
+            # disk with only a preview in the session
+            for tool_call, tool_result in zip(tool_calls, tool_results):
+                tool_message = await asyncio.to_thread(read_tracker.dedupe, tool_call, {
+                    "role": "tool",
+                    "tool_call_id": tool_call["id"],
+                    "content": tool_result
+                }, message_history, result_refs)
+                message_history.append(
+                    await asyncio.to_thread(result_store.spill, tool_message, result_refs)
+                )
+
+            # Stream the next round into a fresh message
+            msg = cl.Message(content="")
+            await msg.send()
 
         # Update message history in session
         cl.user_session.set("message_history", message_history)
 
+    except LLMBusyError as e:
+        error_class = type(e).__name__
+        await cl.Message(
+            content="⏳ 지금 요청이 많아 답변을 시작하지 못했습니다. 잠시 후 다시 시도해주세요."
+        ).send()
+        print(f"LLM busy: {e}")
+
     except Exception as e:
+        error_class = type(e).__name__
         error_msg = f"❌ 오류가 발생했습니다: {str(e)}"
         await cl.Message(content=error_msg).send()
         print(f"Error: {e}")
 
+    metrics.record_turn(time.perf_counter() - turn_started, rounds, error_class)
+
+
+@cl.on_chat_end
+async def end():
+    """Cancel LLM streams and tool calls still running when the session ends"""
+    for task in list(cl.user_session.get("active_tasks", set())):
+        task.cancel()
+    # Release the session's stored tool results
+    result_store.release_all(cl.user_session.get("result_refs", set()))
+
 
 if __name__ == "__main__":
     # This is for development purposes
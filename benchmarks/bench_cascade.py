@@ -0,0 +1,110 @@
+"""
+Model Cascade Benchmark
+Compares turn latency with one model for every round versus a fast router
+model for tool rounds and the answer model for the final answer only
+
+Each tier is served by its own local LLM stub (llm_stub.py) with its own
+latency and streaming rate, and every LLM call is timed per tier.
+
+Usage:
+    uv run python benchmarks/bench_cascade.py [--turns 5] [--answer-latency-ms 800]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import contextlib
+import statistics
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from llm_stub import StubLLMServer
+
+SCRIPT = {"rounds": [
+    {"tool_calls": [{"name": "list_files", "arguments": {"directory_path": ".", "limit": 20}}]},
+    {"content": " ".join(f"word{i}" for i in range(120))}
+]}
+
+
+async def run(args: argparse.Namespace) -> None:
+    answer_stub = StubLLMServer(script=SCRIPT, tokens_per_sec=args.answer_tokens_per_sec, latency_ms=args.answer_latency_ms)
+    router_stub = StubLLMServer(script=SCRIPT, tokens_per_sec=args.router_tokens_per_sec, latency_ms=args.router_latency_ms)
+    answer_port = await answer_stub.start()
+    router_port = await router_stub.start()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{answer_port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    import chainlit as cl
+    from chainlit.context import init_http_context
+
+    import app
+
+    # Time every LLM call by tier
+    tier_seconds: Dict[str, List[float]] = defaultdict(list)
+    stream_completion = app.stream_completion
+
+    async def timed_stream_completion(*call_args, tier: str = "answer", **kwargs):
+        started = time.perf_counter()
+        try:
+            return await stream_completion(*call_args, tier=tier, **kwargs)
+        finally:
+            tier_seconds[tier].append(time.perf_counter() - started)
+
+    app.stream_completion = timed_stream_completion
+
+    async def turn() -> float:
+        init_http_context()
+        await app.start()
+        started = time.perf_counter()
+        await app.main(cl.Message(content="list the files"))
+        elapsed = time.perf_counter() - started
+        answer = cl.user_session.get("message_history")[-1]
+        assert answer["role"] == "assistant" and answer["content"], "turn did not finish"
+        return elapsed
+
+    async def measure() -> float:
+        # Each turn runs in its own task so it gets its own Chainlit context
+        return statistics.median([await asyncio.create_task(turn()) for _ in range(args.turns)])
+
+    results = {}
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        app.ROUTER_MODEL = ""
+        results["single model"] = (await measure(), dict(tier_seconds))
+        tier_seconds.clear()
+        app.ROUTER_MODEL = "router"
+        app.router_client = app.get_gateway().client_for(api_key="stub", base_url=f"http://127.0.0.1:{router_port}/v1")
+        results["cascade"] = (await measure(), dict(tier_seconds))
+
+    await router_stub.close()
+    await answer_stub.close()
+
+    print(
+        f"Answer model: {args.answer_latency_ms:g} ms + {args.answer_tokens_per_sec:g} tokens/s, "
+        f"router model: {args.router_latency_ms:g} ms + {args.router_tokens_per_sec:g} tokens/s, "
+        f"median of {args.turns} turns"
+    )
+    for mode, (latency, per_tier) in results.items():
+        calls = ", ".join(
+            f"{tier} {len(seconds) / args.turns:g} calls x {statistics.median(seconds) * 1000:.0f} ms"
+            for tier, seconds in sorted(per_tier.items())
+        )
+        print(f"{mode:<13} turn {latency * 1000:7.0f} ms  ({calls})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--answer-latency-ms", type=float, default=800.0, help="Answer model first-chunk latency")
+    parser.add_argument("--answer-tokens-per-sec", type=float, default=40.0, help="Answer model streaming rate")
+    parser.add_argument("--router-latency-ms", type=float, default=100.0, help="Router model first-chunk latency")
+    parser.add_argument("--router-tokens-per-sec", type=float, default=200.0, help="Router model streaming rate")
+    parser.add_argument("--turns", type=int, default=5, help="Turns per mode")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
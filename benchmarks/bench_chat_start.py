@@ -0,0 +1,101 @@
+"""
+Chat Start Benchmark
+Compares chat-start latency of spawning MCP servers per chat (the old
+on_chat_start in test.py) with the shared MCPServerPool
+
+Uses mcp_server.py over stdio as a local stand-in for the uvx servers.
+
+Usage:
+    uv run python benchmarks/bench_chat_start.py [--chats 5] [--servers 2]
+"""
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from contextlib import AsyncExitStack
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from mcp_pool import MCPServerPool
+
+
+def local_servers(count: int) -> Dict[str, StdioServerParameters]:
+    """Server parameters running this repo's MCP server over stdio"""
+    params = StdioServerParameters(
+        command=sys.executable,
+        args=["-c", "from mcp_server import mcp; mcp.run(transport='stdio', show_banner=False)"],
+        cwd=str(ROOT),
+        env=None
+    )
+    return {f"local{i}": params for i in range(count)}
+
+
+async def per_chat_start(servers: Dict[str, StdioServerParameters]) -> float:
+    """One chat start the old way: spawn, initialize and load every server"""
+    started = time.perf_counter()
+    async with AsyncExitStack() as stack:
+        all_tools = []
+        for server_params in servers.values():
+            read, write = await stack.enter_async_context(stdio_client(server_params))
+            session = await stack.enter_async_context(ClientSession(read, write))
+            await session.initialize()
+            all_tools.extend(await load_mcp_tools(session))
+        elapsed = time.perf_counter() - started
+    return elapsed
+
+
+async def pooled_start(pool: MCPServerPool) -> float:
+    """One chat start with the shared pool"""
+    started = time.perf_counter()
+    await pool.start()
+    pool.get_tools()
+    return time.perf_counter() - started
+
+
+def report(label: str, samples: List[float]) -> None:
+    print(
+        f"{label:<28} mean {statistics.mean(samples) * 1000:9.1f} ms   "
+        f"max {max(samples) * 1000:9.1f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--chats", type=int, default=5)
+    parser.add_argument("--servers", type=int, default=2)
+    args = parser.parse_args()
+
+    servers = local_servers(args.servers)
+
+    per_chat = [await per_chat_start(servers) for _ in range(args.chats)]
+    report("Per-chat server spawn", per_chat)
+
+    pool = MCPServerPool(servers)
+    warmup = time.perf_counter()
+    await pool.start()
+    print(f"{'Pool warm-up (once)':<28} {(time.perf_counter() - warmup) * 1000:14.1f} ms")
+    try:
+        pooled = [await pooled_start(pool) for _ in range(args.chats)]
+        report("Pooled chat start", pooled)
+
+        # Calls from concurrent chats share the pooled sessions
+        tool = next(t for t in pool.get_tools() if t.name == "list_files")
+        results = await asyncio.gather(*(
+            tool.ainvoke({"directory_path": str(ROOT), "limit": 1}) for _ in range(20)
+        ))
+        print(f"20 concurrent pooled tool calls OK: {all(results)}")
+        print(f"Pool status: {pool.status()}")
+    finally:
+        await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,204 @@
+"""
+Load Benchmark
+Drives N concurrent simulated chat sessions through app.py's on_chat_start
+and on_message handlers against the local LLM stub (llm_stub.py), and
+reports latency percentiles, throughput and peak RSS as JSON
+
+The stub runs in its own process so it does not compete with the app for
+the event loop. Sessions run inside Chainlit's HTTP context, so messages go
+through the real cl.Message code with a recording emitter instead of a
+websocket.
+
+Metrics:
+    ttft_ms          user message to the first streamed UI frame of the turn
+    tool_rtt_ms      one tool call, from dispatch to result
+    turn_latency_ms  user message to the end of the final answer
+
+Usage:
+    uv run python benchmarks/bench_load.py --sessions 50 --turns 2 --tokens-per-sec 50
+    uv run python benchmarks/bench_load.py --sessions 50 --output results/before.json
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import statistics
+import subprocess
+import contextlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from llm_stub import add_stub_arguments
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    """p50/p95/p99, mean and max of a sample, in milliseconds"""
+    if not values:
+        return {"count": 0, "p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    ms = [v * 1000 for v in values]
+    cuts = statistics.quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else ms * 99
+    return {
+        "count": len(ms),
+        "p50": round(cuts[49], 2),
+        "p95": round(cuts[94], 2),
+        "p99": round(cuts[98], 2),
+        "mean": round(statistics.fmean(ms), 2),
+        "max": round(max(ms), 2),
+    }
+
+
+def start_stub(args: argparse.Namespace) -> subprocess.Popen:
+    """Start llm_stub.py in a subprocess and wait until it listens"""
+    command = [
+        sys.executable, str(Path(__file__).resolve().parent / "llm_stub.py"),
+        "--port", "0",
+        "--tokens-per-sec", str(args.tokens_per_sec),
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--answer-tokens", str(args.answer_tokens),
+    ]
+    if args.script:
+        command += ["--script", args.script]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if "listening on" not in line:
+        process.kill()
+        raise RuntimeError(f"LLM stub failed to start: {line!r}")
+    os.environ["OPENAI_BASE_URL"] = line.rsplit(" ", 1)[1].strip()
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    return process
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_load(args: argparse.Namespace) -> Dict[str, Any]:
+    # Imported after start_stub() so the app's client points at the stub
+    import chainlit as cl
+    from chainlit.context import init_http_context
+    from chainlit.emitter import BaseChainlitEmitter
+
+    import app
+
+    class RecordingEmitter(BaseChainlitEmitter):
+        """Emitter that records streamed frames instead of sending them"""
+
+        def __init__(self, session):
+            super().__init__(session)
+            self.first_frame: Optional[float] = None
+            self.frames = 0
+            self.chars = 0
+
+        async def send_token(self, id: str, token: str, is_sequence=False, is_input=False):
+            if self.first_frame is None:
+                self.first_frame = time.perf_counter()
+            self.frames += 1
+            self.chars += len(token)
+
+    ttfts: List[float] = []
+    turn_latencies: List[float] = []
+    tool_rtts: List[float] = []
+    errors: List[str] = []
+    totals = {"frames": 0, "chars": 0, "turns": 0}
+
+    execute_tool_call = app.execute_tool_call
+
+    async def timed_tool_call(tool_call):
+        started = time.perf_counter()
+        try:
+            return await execute_tool_call(tool_call)
+        finally:
+            tool_rtts.append(time.perf_counter() - started)
+
+    app.execute_tool_call = timed_tool_call
+
+    async def session(index: int) -> None:
+        context = init_http_context()
+        emitter = RecordingEmitter(context.session)
+        context.emitter = emitter
+        try:
+            await app.start()
+            for turn in range(args.turns):
+                emitter.first_frame = None
+                started = time.perf_counter()
+                await app.main(cl.Message(content=f"session {index} turn {turn}: list the files"))
+                turn_latencies.append(time.perf_counter() - started)
+                if emitter.first_frame is not None:
+                    ttfts.append(emitter.first_frame - started)
+                totals["turns"] += 1
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+        finally:
+            totals["frames"] += emitter.frames
+            totals["chars"] += emitter.chars
+
+    started = time.perf_counter()
+    # The app prints per-round diagnostics; keep the report readable
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        await asyncio.gather(*[session(i) for i in range(args.sessions)])
+    elapsed = time.perf_counter() - started
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "sessions": args.sessions,
+            "turns": args.turns,
+            "tokens_per_sec": args.tokens_per_sec,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "answer_tokens": args.answer_tokens,
+            "script": args.script,
+        },
+        "ttft_ms": percentiles(ttfts),
+        "tool_rtt_ms": percentiles(tool_rtts),
+        "turn_latency_ms": percentiles(turn_latencies),
+        "throughput": {
+            "elapsed_seconds": round(elapsed, 3),
+            "turns_per_sec": round(totals["turns"] / elapsed, 2),
+            "ui_frames_per_sec": round(totals["frames"] / elapsed, 2),
+            "streamed_chars_per_sec": round(totals["chars"] / elapsed, 2),
+        },
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=50, help="Concurrent chat sessions")
+    parser.add_argument("--turns", type=int, default=2, help="User messages per session")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    stub = start_stub(args)
+    try:
+        report = asyncio.run(run_load(args))
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+MCP Server Load Test
+Starts mcp_server.py over SSE on a local port and opens many concurrent SSE
+clients against it, reporting throughput and tail latency
+
+Each client is an AsyncMCPClient with its own SSE session that makes
+`--calls` tool calls (read_file and list_files by default). With
+`--slow-read` one extra client keeps reading a large file, to check that a
+slow read does not stall the other clients.
+
+Usage:
+    uv run python benchmarks/bench_mcp_server.py --clients 200 --calls 10
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_load import percentiles
+from mcp_client import AsyncMCPClient
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int) -> subprocess.Popen:
+    """Start mcp_server.py with SSE transport and wait until it accepts connections"""
+    process = subprocess.Popen(
+        [
+            sys.executable, "-c",
+            "from mcp_server import mcp; "
+            f"mcp.run(transport='sse', host='127.0.0.1', port={port}, show_banner=False)"
+        ],
+        cwd=str(ROOT),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("MCP server exited during startup")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("MCP server did not start within 30 seconds")
+
+
+async def run_client(base_url: str, calls: List[Dict[str, Any]], latencies: List[float], errors: List[str]) -> float:
+    """One SSE client making its calls in sequence, returning its session setup time"""
+    started = time.perf_counter()
+    async with AsyncMCPClient(base_url, max_connections=2, max_concurrency=2) as client:
+        await client.get_tools()
+        setup = time.perf_counter() - started
+        for call in calls:
+            call_started = time.perf_counter()
+            try:
+                result = await client.acall_tool(call["name"], call["arguments"])
+                if result.startswith("Error"):
+                    errors.append(result[:200])
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+            latencies.append(time.perf_counter() - call_started)
+    return setup
+
+
+async def slow_reader(base_url: str, path: str, stop: asyncio.Event, durations: List[float]) -> None:
+    """Keep reading a large file until the load test is over"""
+    async with AsyncMCPClient(base_url) as client:
+        while not stop.is_set():
+            started = time.perf_counter()
+            await client.acall_tool("read_file", {"file_path": path, "max_bytes": 1_000_000})
+            durations.append(time.perf_counter() - started)
+
+
+async def run(args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    calls = [
+        {"name": "read_file", "arguments": {"file_path": str(ROOT / "README.md"), "max_bytes": 4000}},
+        {"name": "list_files", "arguments": {"directory_path": str(ROOT), "limit": 50}},
+    ]
+    client_calls = [calls[i % len(calls)] for i in range(args.calls)]
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    stop = asyncio.Event()
+    slow_durations: List[float] = []
+    slow_task = None
+    big_file = None
+    if args.slow_read:
+        big_file = tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False)
+        big_file.write("slow read line\n" * 2_000_000)
+        big_file.close()
+        slow_task = asyncio.create_task(slow_reader(base_url, big_file.name, stop, slow_durations))
+
+    started = time.perf_counter()
+    try:
+        setups = await asyncio.gather(*[
+            run_client(base_url, client_calls, latencies, errors) for _ in range(args.clients)
+        ])
+    finally:
+        elapsed = time.perf_counter() - started
+        stop.set()
+        if slow_task is not None:
+            await slow_task
+            os.unlink(big_file.name)
+
+    report = {
+        "clients": args.clients,
+        "calls_per_client": args.calls,
+        "elapsed_seconds": round(elapsed, 3),
+        "calls_per_sec": round(len(latencies) / elapsed, 1),
+        "session_setup_ms": percentiles(list(setups)),
+        "call_latency_ms": percentiles(latencies),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+    }
+    if args.slow_read:
+        report["slow_read_ms"] = percentiles(slow_durations)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200, help="Concurrent SSE clients")
+    parser.add_argument("--calls", type=int, default=10, help="Tool calls per client")
+    parser.add_argument("--slow-read", action="store_true", help="Add a client reading a large file")
+    parser.add_argument("--url", help="Test a running server instead of starting one")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        port = free_port()
+        server = start_server(port)
+        base_url = f"http://127.0.0.1:{port}"
+    try:
+        report = asyncio.run(run(args, base_url))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Batch Read Benchmark
+Compares a turn that reads several files with one read_file call per LLM
+round against one that reads them all with a single read_files call
+
+The turns run through app.py's handlers against a local LLM stub
+(llm_stub.py) with a fixed latency per request, so the difference is the
+LLM round trips saved.
+
+Usage:
+    uv run python benchmarks/bench_read_files.py [--files 5] [--latency-ms 500]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import contextlib
+import statistics
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from llm_stub import StubLLMServer
+
+
+def build_files(workdir: str, count: int, kb: int) -> List[str]:
+    """Write `count` config-like files of about `kb` KB each"""
+    paths = []
+    for i in range(count):
+        path = os.path.join(workdir, f"service_{i}.yaml")
+        with open(path, "w") as f:
+            for j in range(kb * 1024 // 32):
+                f.write(f"key_{j:05d}: value-{i}-{j:05d}\n")
+        paths.append(path)
+    return paths
+
+
+async def run(args: argparse.Namespace, paths: List[str]) -> None:
+    one_per_round = {"rounds": [
+        *({"tool_calls": [{"name": "read_file", "arguments": {"file_path": path}}]} for path in paths),
+        {"content": "The files differ only in their values."}
+    ]}
+    batched = {"rounds": [
+        {"tool_calls": [{"name": "read_files", "arguments": {"file_paths": paths}}]},
+        {"content": "The files differ only in their values."}
+    ]}
+
+    import chainlit as cl
+    from chainlit.context import init_http_context
+
+    import app
+    app.MAX_TOOL_ROUNDS = max(app.MAX_TOOL_ROUNDS, len(paths))
+
+    async def turn() -> float:
+        init_http_context()
+        await app.start()
+        started = time.perf_counter()
+        await app.main(cl.Message(content="compare these config files"))
+        elapsed = time.perf_counter() - started
+        answer = cl.user_session.get("message_history")[-1]
+        assert answer["role"] == "assistant" and answer["content"], "turn did not finish"
+        return elapsed
+
+    results: Dict[str, Tuple[float, float]] = {}
+    for mode, script in (("read_file x N", one_per_round), ("read_files", batched)):
+        stub = StubLLMServer(script=script, tokens_per_sec=0, latency_ms=args.latency_ms)
+        port = await stub.start()
+        app.client = app.get_gateway().client_for(api_key="stub", base_url=f"http://127.0.0.1:{port}/v1")
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            # Each turn runs in its own task so it gets its own Chainlit context
+            latencies = [await asyncio.create_task(turn()) for _ in range(args.turns)]
+        await stub.close()
+        results[mode] = (statistics.median(latencies), stub.requests / args.turns)
+
+    print(
+        f"{len(paths)} files of {args.file_kb} KB, LLM latency {args.latency_ms:g} ms, "
+        f"median of {args.turns} turns"
+    )
+    for mode, (latency, requests) in results.items():
+        print(f"{mode:<14} turn {latency * 1000:7.0f} ms  ({requests:g} LLM calls)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=5, help="Files read per turn")
+    parser.add_argument("--file-kb", type=int, default=4, help="Size of each file")
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="LLM first-chunk latency")
+    parser.add_argument("--turns", type=int, default=3, help="Turns per mode")
+    args = parser.parse_args()
+
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    with tempfile.TemporaryDirectory() as workdir:
+        asyncio.run(run(args, build_files(workdir, args.files, args.file_kb)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Relevant Read Benchmark
+Compares the prompt tokens of read_file and read_file_relevant on a large
+synthetic document, and the cost of building versus reusing its chunk index
+
+Usage:
+    uv run python benchmarks/bench_relevant.py [--sections 2000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import mcp_tools
+from history import estimate_tokens
+
+WORDS = [
+    "alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel",
+    "india", "juliet", "kilo", "lima", "mike", "november", "oscar", "papa",
+    "config", "handler", "request", "response", "session", "token", "buffer",
+]
+NEEDLE = (
+    "## Dependencies\n\n"
+    "The service requires httpx for HTTP/2 pooling and chainlit for the UI.\n"
+    "Pin dependencies in pyproject.toml and lock them with uv.\n"
+)
+QUERY = "what dependencies does the service require"
+
+
+def build_document(path: str, sections: int) -> None:
+    """Write a Markdown document of `sections` filler sections with NEEDLE in the middle"""
+    rng = random.Random(42)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(sections):
+            if i == sections // 2:
+                f.write(NEEDLE + "\n")
+            f.write(f"## Section {i}\n\n")
+            for _ in range(3):
+                f.write(" ".join(rng.choices(WORDS, k=60)) + "\n\n")
+
+
+def timed(label: str, func: Callable):
+    """Run `func` once and print how long it took"""
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<38} {(time.perf_counter() - start) * 1000:8.1f} ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sections", type=int, default=2000, help="Filler sections in the document")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "big.md")
+        build_document(path, args.sections)
+        print(f"Document: {os.path.getsize(path)} bytes, query: {QUERY!r}")
+
+        full = timed("read_file", lambda: mcp_tools.read_file(path))
+        cold = timed("read_file_relevant (build index)", lambda: mcp_tools.read_file_relevant(path, QUERY))
+        warm = timed("read_file_relevant (cached index)", lambda: mcp_tools.read_file_relevant(path, QUERY))
+        assert cold == warm and "requires httpx" in warm, "the relevant section was not returned"
+
+        print(f"{'Tokens, read_file':<38} {estimate_tokens(full):8d}")
+        print(f"{'Tokens, read_file_relevant':<38} {estimate_tokens(warm):8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Result Store Memory Benchmark
+Runs many simulated chat sessions that each read several large files and
+compares worker memory with tool results kept in the session history
+versus spilled to the result store
+
+Memory is the live Python heap held once all sessions have finished
+(tracemalloc), and the size of the retained histories' message contents;
+process RSS is too noisy at this scale to show the difference. Each mode
+runs in its own process, with the sessions driven through app.py's
+handlers against an in-process LLM stub. The read_file cache is disabled
+so every session holds its own copy of each result, as it would when
+sessions read different files.
+
+Usage:
+    uv run python benchmarks/bench_result_store.py --sessions 500 --file-kb 100
+"""
+import gc
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+import contextlib
+from pathlib import Path
+from typing import Any, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from llm_stub import StubLLMServer
+
+
+def history_bytes(histories) -> int:
+    """Bytes of the message contents retained by the histories"""
+    return sum(sys.getsizeof(m.get("content") or "") for h in histories for m in h)
+
+
+async def run_sessions(args: argparse.Namespace, workdir: str) -> Dict[str, Any]:
+    paths = []
+    for i in range(args.files):
+        path = os.path.join(workdir, f"file_{i}.txt")
+        with open(path, "w") as f:
+            line = f"file {i}: " + "lorem ipsum dolor sit amet " * 3 + "\n"
+            f.write(line * (args.file_kb * 1024 // len(line)))
+        paths.append(path)
+
+    script = {"rounds": [
+        {"tool_calls": [{"name": "read_file", "arguments": {"file_path": path}} for path in paths]},
+        {"content": "Read them all."}
+    ]}
+    stub = StubLLMServer(script=script, tokens_per_sec=0)
+    port = await stub.start()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    import chainlit as cl
+    from chainlit.context import init_http_context
+
+    import app
+    import result_store
+
+    histories = []
+
+    async def session() -> None:
+        init_http_context()
+        await app.start()
+        await app.main(cl.Message(content="read the files"))
+        # Keep the session's history alive, as cl.user_session would
+        histories.append(cl.user_session.get("message_history"))
+
+    # One warm-up session, so one-time allocations (lazy imports, client
+    # and store set-up) are not counted
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        await asyncio.create_task(session())
+    histories.clear()
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        for batch in range(0, args.sessions, args.concurrency):
+            count = min(args.concurrency, args.sessions - batch)
+            await asyncio.gather(*[asyncio.create_task(session()) for _ in range(count)])
+    elapsed = time.perf_counter() - started
+    await stub.close()
+    gc.collect()
+    heap = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    report = {
+        "sessions": len(histories),
+        "history_mb": round(history_bytes(histories) / 1e6, 1),
+        "heap_mb": round(heap / 1e6, 1),
+        "elapsed_seconds": round(elapsed, 2),
+    }
+    if result_store._store is not None:
+        directory = result_store._store.directory
+        report["stored_texts"] = result_store._store.stats()["texts"]
+        report["stored_bytes"] = sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(directory) for name in names
+        )
+    return report
+
+
+def run_mode(args: argparse.Namespace, spill_chars: int) -> Dict[str, Any]:
+    """Run the sessions in a fresh process and return its report"""
+    env = dict(os.environ, RESULT_SPILL_CHARS=str(spill_chars), READ_CACHE_BYTES="0")
+    output = subprocess.check_output(
+        [sys.executable, __file__, "--child",
+         "--sessions", str(args.sessions), "--files", str(args.files),
+         "--file-kb", str(args.file_kb), "--concurrency", str(args.concurrency)],
+        env=env, text=True
+    )
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=500, help="Simulated chat sessions")
+    parser.add_argument("--files", type=int, default=3, help="Files read per session")
+    parser.add_argument("--file-kb", type=int, default=100, help="Size of each file")
+    parser.add_argument("--concurrency", type=int, default=50, help="Sessions running at once")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        with tempfile.TemporaryDirectory() as workdir:
+            print(json.dumps(asyncio.run(run_sessions(args, workdir))))
+        return
+
+    print(f"{args.sessions} sessions, each reading {args.files} files of {args.file_kb} KB")
+    for label, spill_chars in (("in history", 0), ("spilled", 2000)):
+        report = run_mode(args, spill_chars)
+        line = (
+            f"{label:<11} history {report['history_mb']:7.1f} MB  "
+            f"live heap +{report['heap_mb']:7.1f} MB  "
+            f"{report['elapsed_seconds']:6.2f} s"
+        )
+        if "stored_texts" in report:
+            line += f"  on disk: {report['stored_texts']} texts, {report['stored_bytes'] / 1e6:.1f} MB"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Search Benchmark
+Compares indexed search_files queries with a brute-force scan on a synthetic tree
+
+Usage:
+    uv run python benchmarks/bench_search.py [--files 100000]
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from search_index import SearchIndex
+
+WORDS = [
+    "alpha", "bravo", "charlie", "delta", "echo", "foxtrot", "golf", "hotel",
+    "india", "juliet", "kilo", "lima", "mike", "november", "oscar", "papa",
+    "config", "handler", "request", "response", "session", "token", "buffer",
+]
+NEEDLE = "def compute_checksum_v2("
+
+
+def build_tree(root: str, files: int, needles: int) -> None:
+    """Create `files` small source-like files, `needles` of which contain NEEDLE"""
+    rng = random.Random(42)
+    needle_ids = set(rng.sample(range(files), needles))
+    for i in range(files):
+        directory = os.path.join(root, f"pkg{i // 1000:03d}", f"mod{(i // 100) % 10}")
+        os.makedirs(directory, exist_ok=True)
+        lines = [
+            f"def {rng.choice(WORDS)}_{rng.choice(WORDS)}({rng.choice(WORDS)}):"
+            f"  # {' '.join(rng.choices(WORDS, k=6))}"
+            for _ in range(8)
+        ]
+        if i in needle_ids:
+            lines.insert(rng.randrange(len(lines)), f"{NEEDLE}data):")
+        with open(os.path.join(directory, f"file_{i}.py"), "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+def brute_force(root: str, pattern: "re.Pattern") -> List[Tuple[str, int]]:
+    """Scan every file, the way the agent would without an index"""
+    hits = []
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            with open(path, encoding="utf-8", errors="replace") as f:
+                for line_no, line in enumerate(f, 1):
+                    if pattern.search(line):
+                        hits.append((os.path.relpath(path, root), line_no))
+    return hits
+
+
+def timed(label: str, func: Callable):
+    """Run `func` once and print how long it took"""
+    start = time.perf_counter()
+    result = func()
+    print(f"{label:<38} {time.perf_counter() - start:8.3f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--needles", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        root = os.path.join(workdir, "tree")
+        index_path = os.path.join(workdir, "index.db")
+
+        timed(f"Create {args.files} files", lambda: build_tree(root, args.files, args.needles))
+
+        index = SearchIndex(root, index_path, refresh_interval=0)
+        stats = timed("Initial index build", lambda: index.refresh(force=True))
+        print(f"  {stats}")
+        stats = timed("Incremental refresh (no changes)", lambda: index.refresh(force=True))
+        print(f"  {stats}")
+
+        changed = sorted(Path(root).rglob("file_1*.py"))[:10]
+        for path in changed:
+            path.write_text(path.read_text() + "# touched\n")
+        stats = timed("Incremental refresh (10 changed)", lambda: index.refresh(force=True))
+        print(f"  {stats}")
+
+        index.refresh_interval = 3600
+        queries = [
+            ("literal", NEEDLE, False),
+            ("regex", r"def compute_\w+_v2\(", True),
+        ]
+        for name, query, regex in queries:
+            pattern = re.compile(query if regex else re.escape(query))
+            indexed, _ = timed(
+                f"Indexed {name} query",
+                lambda: index.search(query, regex=regex, max_results=10 ** 6, context_lines=0)
+            )
+            scanned = timed(f"Brute-force {name} scan", lambda: brute_force(root, pattern))
+            indexed_hits = sorted((path, line_no) for path, line_no, _ in indexed)
+            status = "OK" if indexed_hits == sorted(scanned) else "MISMATCH"
+            print(f"  {len(indexed_hits)} hits indexed, {len(scanned)} hits scanned: {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Speculative Tool Execution Benchmark
+Compares turn latency with tools started only after the stream ends versus
+started as soon as each call's arguments are complete
+
+The stubbed model first requests a slow tool, then keeps streaming two more
+tool calls; with speculation the slow tool runs while those are streamed.
+
+Usage:
+    uv run python benchmarks/bench_speculative.py [--tool-seconds 0.5] [--tokens-per-sec 20]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import contextlib
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from llm_stub import StubLLMServer
+
+
+def slow_tool(seconds: float, label: str = "") -> str:
+    """Blocking tool that simulates a slow read"""
+    time.sleep(seconds)
+    return f"done {label}"
+
+
+async def run(args: argparse.Namespace) -> None:
+    script = {"rounds": [
+        {"tool_calls": [
+            {"name": "slow_tool", "arguments": {"seconds": args.tool_seconds, "label": "slow"}},
+            {"name": "list_files", "arguments": {"directory_path": ".", "limit": 20}},
+            {"name": "list_files", "arguments": {"directory_path": "benchmarks", "limit": 20}},
+        ]},
+        {"content": "All three tools returned."}
+    ]}
+    stub = StubLLMServer(script=script, tokens_per_sec=args.tokens_per_sec, latency_ms=args.latency_ms)
+    port = await stub.start()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+    import chainlit as cl
+    from chainlit.context import init_http_context
+
+    import app
+    import mcp_tools
+
+    mcp_tools.TOOLS["slow_tool"] = {
+        "function": slow_tool,
+        "description": "Sleep for a while",
+        "parameters": {"type": "object", "properties": {}, "required": []}
+    }
+
+    async def turn() -> float:
+        init_http_context()
+        await app.start()
+        started = time.perf_counter()
+        await app.main(cl.Message(content="run the tools"))
+        elapsed = time.perf_counter() - started
+        answer = cl.user_session.get("message_history")[-1]
+        assert answer["role"] == "assistant" and answer["content"], "turn did not finish"
+        return elapsed
+
+    async def measure() -> float:
+        # Each turn runs in its own task so it gets its own Chainlit context
+        return statistics.median([await asyncio.create_task(turn()) for _ in range(args.turns)])
+
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        app.SPECULATIVE_TOOLS = False
+        after_stream = await measure()
+        app.SPECULATIVE_TOOLS = True
+        speculative = await measure()
+
+    await stub.close()
+    print(f"Tool latency {args.tool_seconds * 1000:.0f} ms, {args.tokens_per_sec:g} tokens/s, median of {args.turns} turns")
+    print(f"Turn latency, tools after stream: {after_stream * 1000:7.0f} ms")
+    print(f"Turn latency, speculative tools:  {speculative * 1000:7.0f} ms")
+    print(f"Saved: {(after_stream - speculative) * 1000:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tool-seconds", type=float, default=0.5, help="Latency of the slow tool")
+    parser.add_argument("--tokens-per-sec", type=float, default=20.0, help="Stub streaming rate")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Stub first-chunk latency")
+    parser.add_argument("--turns", type=int, default=3, help="Turns per mode")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Startup Benchmark
+Measures worker cold start: the import time of app.py and test.py (parsed
+from `python -X importtime`) and the time from process start until app.py's
+on_chat_start handler has finished
+
+Exits with status 1 when startup regresses:
+- a module that must be imported lazily (DEFERRED) is imported at startup
+- the import time of a module beyond chainlit itself exceeds --max-own-ms
+
+Every measurement runs in a fresh interpreter in a temporary directory
+(importing chainlit creates .chainlit/ and .files/ in the working directory).
+
+Usage:
+    uv run python benchmarks/bench_startup.py [--runs 3] [--max-own-ms 300]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules whose startup import time is measured
+MODULES = ["app", "test"]
+
+# Heavy dependencies each module must only import on first use
+DEFERRED = {
+    "app": ["openai"],
+    "test": ["langgraph", "langchain_openai", "langchain_core"],
+}
+
+# "import time: <self us> | <cumulative us> | <indent><module>"
+_IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$")
+
+CHAT_START = """
+import sys, asyncio, contextlib
+with contextlib.redirect_stdout(sys.stderr):
+    from chainlit.context import init_http_context
+    import app
+
+    async def chat_start():
+        init_http_context()
+        await app.start()
+
+    asyncio.run(chat_start())
+print("ready", flush=True)
+"""
+
+
+def child_env() -> Dict[str, str]:
+    """Environment of the measured interpreters"""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    env.setdefault("OPENAI_API_KEY", "stub")
+    return env
+
+
+def import_times(module: str, workdir: str) -> List[Tuple[int, str, int]]:
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Returns:
+        (depth, module, cumulative microseconds) of every import, in the
+        order the interpreter reports them
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=workdir, env=child_env(), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    imports = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            imports.append((depth, match.group(4), int(match.group(2))))
+    return imports
+
+
+def chat_start_seconds(workdir: str) -> float:
+    """Seconds from process start until app.start() has finished"""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", CHAT_START],
+        cwd=workdir, env=child_env(), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    line = process.stdout.readline()
+    elapsed = time.perf_counter() - started
+    process.wait()
+    if line.strip() != "ready":
+        raise RuntimeError("app.start() did not finish")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="Interpreters started per measurement")
+    parser.add_argument("--max-own-ms", type=float, default=300.0,
+                        help="Allowed import time of each module beyond chainlit")
+    parser.add_argument("--top", type=int, default=5, help="Slowest direct imports to list per module")
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for module in MODULES:
+            runs = [import_times(module, workdir) for _ in range(args.runs)]
+            totals, owns = [], []
+            for imports in runs:
+                total = next(us for depth, name, us in imports if depth == 0 and name == module)
+                framework = sum(us for depth, name, us in imports if depth == 1 and name == "chainlit")
+                totals.append(total / 1000)
+                owns.append((total - framework) / 1000)
+            total_ms, own_ms = statistics.median(totals), statistics.median(owns)
+            print(f"import {module:<5} {total_ms:7.0f} ms  ({own_ms:.0f} ms beyond chainlit)")
+
+            # Slowest direct imports of the last run
+            direct = sorted(
+                ((us, name) for depth, name, us in runs[-1] if depth == 1),
+                reverse=True
+            )[:args.top]
+            for us, name in direct:
+                print(f"    {name:<30} {us / 1000:7.0f} ms")
+
+            imported = {name for depth, name, us in runs[-1]}
+            eager = [name for name in DEFERRED.get(module, []) if name in imported]
+            if eager:
+                failures.append(f"{module} imports {', '.join(eager)} at startup")
+            if own_ms > args.max_own_ms:
+                failures.append(f"{module} takes {own_ms:.0f} ms to import beyond chainlit (limit {args.max_own_ms:g} ms)")
+
+        ready = statistics.median(chat_start_seconds(workdir) for _ in range(args.runs))
+        print(f"process start to on_chat_start done: {ready * 1000:.0f} ms")
+
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
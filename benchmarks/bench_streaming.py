@@ -0,0 +1,81 @@
+"""
+Streaming Benchmark
+Compares UI frames and CPU time per streamed response, one frame per token
+versus coalesced streaming
+
+Usage:
+    uv run python benchmarks/bench_streaming.py --sessions 200 --tokens 500
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from streaming import StreamCoalescer
+
+
+class FakeMessage:
+    """Stand-in for cl.Message that pays a websocket-like cost per frame"""
+
+    def __init__(self):
+        self.frames = 0
+        self.content = ""
+
+    async def stream_token(self, token: str) -> None:
+        self.frames += 1
+        self.content += token
+        # Serialize the frame and yield to the loop, like a socket.io emit
+        json.dumps({"id": "message-id", "token": token, "isSequence": False})
+        await asyncio.sleep(0)
+
+
+async def stream_response(tokens: int, token_interval: float, interval_ms: float) -> FakeMessage:
+    """Stream one response of `tokens` deltas into a fake message"""
+    msg = FakeMessage()
+    stream = StreamCoalescer(msg, interval_ms=interval_ms)
+    for i in range(tokens):
+        await stream.push(f" tok{i}")
+        if token_interval:
+            await asyncio.sleep(token_interval)
+    await stream.flush()
+    return msg
+
+
+async def run(sessions: int, tokens: int, token_interval: float, interval_ms: float):
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    messages = await asyncio.gather(*[
+        stream_response(tokens, token_interval, interval_ms) for _ in range(sessions)
+    ])
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - wall
+
+    expected = "".join(f" tok{i}" for i in range(tokens))
+    assert all(m.content == expected for m in messages), "streamed text was altered"
+    return sum(m.frames for m in messages) / sessions, cpu / sessions, wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=200, help="Concurrent streamed responses")
+    parser.add_argument("--tokens", type=int, default=500, help="Tokens per response")
+    parser.add_argument("--token-interval-ms", type=float, default=2.0, help="Delay between tokens")
+    parser.add_argument("--flush-ms", type=float, default=40.0, help="Coalescing window")
+    args = parser.parse_args()
+
+    token_interval = args.token_interval_ms / 1000
+    print(f"{args.sessions} sessions x {args.tokens} tokens, one token every {args.token_interval_ms} ms")
+    for label, interval_ms in [("per token", 0), (f"coalesced {args.flush_ms:g} ms", args.flush_ms)]:
+        frames, cpu, wall = asyncio.run(run(args.sessions, args.tokens, token_interval, interval_ms))
+        print(
+            f"{label:>16}: {frames:7.1f} frames/response, "
+            f"{cpu * 1000:6.2f} ms CPU/response, wall {wall:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Tool Runtime Benchmark
+Checks that a concurrent chat keeps streaming tokens while a slow tool runs
+
+Usage:
+    uv run python benchmarks/bench_tool_runtime.py
+"""
+import sys
+import time
+import asyncio
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import mcp_tools
+
+TOOL_SECONDS = 1.0
+TOKEN_INTERVAL = 0.01
+MAX_ALLOWED_GAP = 0.2
+
+
+def slow_tool(seconds: float) -> str:
+    """Blocking tool that simulates a slow read (e.g. a stalled NFS mount)"""
+    time.sleep(seconds)
+    return "done"
+
+
+async def stream_tokens(duration: float) -> List[float]:
+    """Simulate another session streaming tokens, returning the gaps between tokens"""
+    gaps = []
+    last = time.perf_counter()
+    end = last + duration
+    while time.perf_counter() < end:
+        await asyncio.sleep(TOKEN_INTERVAL)
+        now = time.perf_counter()
+        gaps.append(now - last)
+        last = now
+    return gaps
+
+
+async def run_blocking() -> float:
+    """Run the slow tool inline, the way the app used to"""
+    async def tool_call():
+        await asyncio.sleep(0)
+        return mcp_tools.call_tool("slow_tool", {"seconds": TOOL_SECONDS})
+
+    gaps, _ = await asyncio.gather(stream_tokens(TOOL_SECONDS), tool_call())
+    return max(gaps)
+
+
+async def run_async() -> float:
+    """Run the slow tool on the async tool runtime"""
+    gaps, _ = await asyncio.gather(
+        stream_tokens(TOOL_SECONDS),
+        mcp_tools.acall_tool("slow_tool", {"seconds": TOOL_SECONDS})
+    )
+    return max(gaps)
+
+
+async def run_timeout() -> str:
+    """A tool exceeding its timeout returns an error instead of hanging"""
+    return await mcp_tools.acall_tool("slow_tool", {"seconds": TOOL_SECONDS}, timeout=0.1)
+
+
+def main():
+    mcp_tools.TOOLS["slow_tool"] = {
+        "function": slow_tool,
+        "description": "Sleep for a while",
+        "parameters": {"type": "object", "properties": {}, "required": []}
+    }
+
+    blocking_gap = asyncio.run(run_blocking())
+    async_gap = asyncio.run(run_async())
+    timeout_result = asyncio.run(run_timeout())
+
+    print(f"Max token gap, blocking call_tool: {blocking_gap * 1000:.0f} ms")
+    print(f"Max token gap, acall_tool:         {async_gap * 1000:.0f} ms")
+    print(f"Timeout result: {timeout_result}")
+
+    if async_gap > MAX_ALLOWED_GAP:
+        print(f"FAIL: token stream stalled for more than {MAX_ALLOWED_GAP * 1000:.0f} ms")
+        sys.exit(1)
+    if not timeout_result.startswith("Error:"):
+        print("FAIL: timeout was not enforced")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+LLM Stub Server - Local OpenAI-compatible chat-completions endpoint
+Streams scripted responses at a fixed token rate, for benchmarks that must
+run without a real LLM
+
+Each request is answered by the script round matching the number of
+assistant messages since the last user message: round 0 answers the user,
+round 1 answers the first tool results, and so on. Rounds past the end of
+the script use the last round.
+
+Script file format (JSON):
+    {"rounds": [
+        {"tool_calls": [{"name": "list_files", "arguments": {"directory_path": "."}}]},
+        {"content": "Here are the files."}
+    ]}
+A round without "content" or "tool_calls" streams --answer-tokens filler tokens.
+
+Usage:
+    uv run python benchmarks/llm_stub.py --port 8100 --tokens-per-sec 50 --latency-ms 200
+"""
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from typing import Any, Dict, List, Optional
+
+DEFAULT_SCRIPT = {
+    "rounds": [
+        {"tool_calls": [{"name": "list_files", "arguments": {"directory_path": "."}}]},
+        {}
+    ]
+}
+
+
+class StubLLMServer:
+    """Minimal HTTP/1.1 server for POST /v1/chat/completions (streaming and not)"""
+
+    def __init__(
+        self,
+        script: Optional[Dict[str, Any]] = None,
+        tokens_per_sec: float = 50.0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        answer_tokens: int = 50
+    ):
+        """
+        Initialize the stub.
+
+        Args:
+            script: Scripted rounds (see module docstring)
+            tokens_per_sec: Streaming rate of every response (0 for no delay)
+            latency_ms: Delay before the first chunk of a response
+            jitter_ms: Random extra delay added to latency_ms
+            answer_tokens: Filler tokens for rounds without scripted content
+        """
+        self.rounds: List[Dict[str, Any]] = (script or DEFAULT_SCRIPT)["rounds"] or [{}]
+        self.token_delay = 1 / tokens_per_sec if tokens_per_sec > 0 else 0.0
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.answer_tokens = answer_tokens
+        self.requests = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start listening, returning the bound port"""
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    def _round(self, messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Pick the script round for a conversation"""
+        index = 0
+        for message in reversed(messages):
+            if message.get("role") == "user":
+                break
+            if message.get("role") == "assistant":
+                index += 1
+        return self.rounds[min(index, len(self.rounds) - 1)]
+
+    def _pieces(self, round_: Dict[str, Any], offer_tools: bool) -> List[Dict[str, Any]]:
+        """Split a round into the deltas of a streamed response"""
+        if round_.get("tool_calls") and offer_tools:
+            deltas = []
+            for i, call in enumerate(round_["tool_calls"]):
+                arguments = json.dumps(call.get("arguments", {}))
+                deltas.append({"tool_calls": [{
+                    "index": i,
+                    "id": f"call_{uuid.uuid4().hex[:24]}",
+                    "type": "function",
+                    "function": {"name": call["name"], "arguments": ""}
+                }]})
+                # Stream the arguments in a few pieces, like real providers
+                step = max(1, len(arguments) // 4)
+                for start in range(0, len(arguments), step):
+                    deltas.append({"tool_calls": [{
+                        "index": i,
+                        "function": {"arguments": arguments[start:start + step]}
+                    }]})
+            return deltas
+
+        content = round_.get("content")
+        if content is None:
+            words = [f" token{i}" for i in range(self.answer_tokens)]
+        else:
+            words = [word + " " for word in content.split(" ")]
+        return [{"content": word} for word in words]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", "0")))
+
+                if method == "POST" and path.rstrip("/").endswith("/chat/completions"):
+                    await self._complete(json.loads(body or b"{}"), writer)
+                else:
+                    payload = b'{"error": {"message": "not found"}}'
+                    writer.write(
+                        b"HTTP/1.1 404 Not Found\r\nContent-Type: application/json\r\n"
+                        b"Content-Length: " + str(len(payload)).encode() + b"\r\n\r\n" + payload
+                    )
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _complete(self, request: Dict[str, Any], writer: asyncio.StreamWriter) -> None:
+        """Answer one chat-completions request"""
+        self.requests += 1
+        round_ = self._round(request.get("messages", []))
+        deltas = self._pieces(round_, bool(request.get("tools")))
+        finish_reason = "tool_calls" if "tool_calls" in deltas[0] else "stop"
+        base = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+        }
+
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+        if not request.get("stream"):
+            message: Dict[str, Any] = {"role": "assistant", "content": None}
+            if finish_reason == "tool_calls":
+                message["tool_calls"] = [
+                    {
+                        "id": f"call_{uuid.uuid4().hex[:24]}",
+                        "type": "function",
+                        "function": {"name": c["name"], "arguments": json.dumps(c.get("arguments", {}))}
+                    }
+                    for c in round_["tool_calls"]
+                ]
+            else:
+                message["content"] = "".join(d["content"] for d in deltas)
+            payload = json.dumps({
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(deltas), "total_tokens": len(deltas)}
+            }).encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Content-Length: " + str(len(payload)).encode() + b"\r\n\r\n" + payload
+            )
+            await writer.drain()
+            return
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\nTransfer-Encoding: chunked\r\n\r\n"
+        )
+
+        def event(delta: Dict[str, Any], finish: Optional[str] = None) -> None:
+            data = json.dumps({
+                **base,
+                "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]
+            })
+            self._write_chunk(writer, f"data: {data}\n\n".encode())
+
+        event({"role": "assistant", "content": ""})
+        for i, delta in enumerate(deltas):
+            if i and self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            event(delta)
+            await writer.drain()
+        event({}, finish_reason)
+        self._write_chunk(writer, b"data: [DONE]\n\n")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    @staticmethod
+    def _write_chunk(writer: asyncio.StreamWriter, data: bytes) -> None:
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the stub's options to an argument parser"""
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0, help="Streaming rate per response")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Delay before the first chunk")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra first-chunk delay")
+    parser.add_argument("--answer-tokens", type=int, default=50, help="Filler tokens per answer")
+    parser.add_argument("--script", help="JSON file with scripted rounds")
+
+
+def stub_from_arguments(args: argparse.Namespace) -> StubLLMServer:
+    """Create a stub from parsed add_stub_arguments options"""
+    script = None
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            script = json.load(f)
+    return StubLLMServer(
+        script=script,
+        tokens_per_sec=args.tokens_per_sec,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        answer_tokens=args.answer_tokens
+    )
+
+
+async def serve(args: argparse.Namespace) -> None:
+    stub = stub_from_arguments(args)
+    port = await stub.start(args.host, args.port)
+    print(f"LLM stub listening on http://{args.host}:{port}/v1", flush=True)
+    await stub.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    add_stub_arguments(parser)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
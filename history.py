@@ -0,0 +1,230 @@
+"""
+Conversation History - Token-budgeted message history
+Keeps the prompt sent to the LLM within a token budget by compacting old turns
+"""
+import os
+from typing import Dict, Any, List, Set, Tuple
+
+# History budget settings
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "8000"))
+HISTORY_KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", "2"))
+
+# Tool results of older turns longer than this are replaced by a stub
+STUB_MIN_CHARS = 200
+
+# Limits for the running summary of dropped turns
+SUMMARY_MAX_ITEMS = 20
+SUMMARY_ITEM_CHARS = 150
+
+SUMMARY_HEADER = "Summary of earlier conversation:"
+
+# Fixed per-message overhead of the chat format
+_MESSAGE_OVERHEAD = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a text without a tokenizer.
+
+    ASCII text averages about four characters per token; other characters
+    (e.g. Korean) are counted as roughly one token each.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated number of tokens
+    """
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def estimate_message_tokens(message: Dict[str, Any]) -> int:
+    """Estimate the tokens one chat message adds to the prompt"""
+    # A tool result spilled to the result store is sent in full
+    spilled = message.get("spilled")
+    content_tokens = spilled["tokens"] if spilled else estimate_tokens(message.get("content") or "")
+    tokens = _MESSAGE_OVERHEAD + content_tokens
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call["function"]
+        tokens += estimate_tokens(function["name"]) + estimate_tokens(function["arguments"])
+    return tokens
+
+
+def estimate_prompt_tokens(messages: List[Dict[str, Any]]) -> int:
+    """
+    Estimate the prompt size of a message list.
+
+    Args:
+        messages: Chat messages in OpenAI format
+
+    Returns:
+        Estimated number of tokens
+    """
+    return sum(estimate_message_tokens(message) for message in messages)
+
+
+def _split_turns(messages: List[Dict[str, Any]]) -> Tuple[List[Dict], List[List[Dict]]]:
+    """
+    Split messages into leading system messages and turns.
+
+    A turn starts at a user message and holds every assistant and tool
+    message that follows it, so tool calls stay with their results.
+    """
+    prefix = []
+    turns: List[List[Dict]] = []
+    for message in messages:
+        if message["role"] == "user":
+            turns.append([message])
+        elif turns:
+            turns[-1].append(message)
+        else:
+            prefix.append(message)
+    return prefix, turns
+
+
+def _tool_names(messages: List[Dict]) -> Dict[str, str]:
+    """Map tool call ids to tool names"""
+    return {
+        tool_call["id"]: tool_call["function"]["name"]
+        for message in messages
+        for tool_call in message.get("tool_calls") or []
+    }
+
+
+def _stub_tool_results(turn: List[Dict]) -> Set[str]:
+    """
+    Replace long tool results of a turn with short stubs.
+
+    Returns:
+        Tool call ids of the stubbed results
+    """
+    tool_names = _tool_names(turn)
+    stubbed = set()
+    for i, message in enumerate(turn):
+        spilled = message.get("spilled")
+        chars = spilled["chars"] if spilled else len(message.get("content") or "")
+        if message["role"] != "tool" or chars <= STUB_MIN_CHARS:
+            continue
+        name = tool_names.get(message.get("tool_call_id"), "tool")
+        # A fresh message, so no reference to stored content survives
+        turn[i] = {
+            "role": "tool",
+            "tool_call_id": message.get("tool_call_id"),
+            "content": f"[Earlier {name} result omitted ({chars} chars). "
+                       f"Call the tool again if it is needed.]"
+        }
+        stubbed.add(message.get("tool_call_id"))
+    return stubbed
+
+
+def _stub_rereads(turns: List[List[Dict]], removed: Set[str]) -> None:
+    """
+    Stub the notes of repeated reads (see read_dedup) that point at removed
+    tool results, so no note refers to content the prompt no longer has.
+
+    Args:
+        turns: Turns of the history (modified in place)
+        removed: Tool call ids of stubbed or dropped results
+    """
+    if not removed:
+        return
+    for turn in turns:
+        tool_names = _tool_names(turn)
+        for i, message in enumerate(turn):
+            reread = message.get("reread")
+            if reread is None or not any(call_id in removed for call_id, _ in reread["of"]):
+                continue
+            name = tool_names.get(message.get("tool_call_id"), "tool")
+            turn[i] = {
+                "role": "tool",
+                "tool_call_id": message.get("tool_call_id"),
+                "content": f"[{name} result omitted: it repeated an earlier result that is "
+                           f"no longer in the conversation. Call the tool again if it is needed.]"
+            }
+            removed.add(message.get("tool_call_id"))
+
+
+def _summarize_turn(turn: List[Dict]) -> str:
+    """Summarize a dropped turn as one line"""
+    question = (turn[0].get("content") or "").replace("\n", " ")
+    answer = next(
+        (m["content"] for m in reversed(turn) if m["role"] == "assistant" and m.get("content")),
+        ""
+    ).replace("\n", " ")
+    tools = sorted({
+        tool_call["function"]["name"]
+        for message in turn
+        for tool_call in message.get("tool_calls") or []
+    })
+
+    line = f"- User: {question[:SUMMARY_ITEM_CHARS]}"
+    if tools:
+        line += f" (tools: {', '.join(tools)})"
+    if answer:
+        line += f" / Assistant: {answer[:SUMMARY_ITEM_CHARS]}"
+    return line
+
+
+def compact_history(
+    messages: List[Dict[str, Any]],
+    token_budget: int = HISTORY_TOKEN_BUDGET,
+    keep_turns: int = HISTORY_KEEP_TURNS
+) -> List[Dict[str, Any]]:
+    """
+    Compact a conversation so its prompt fits the token budget.
+
+    The most recent `keep_turns` turns are kept verbatim. While over budget,
+    long tool results of older turns are replaced by stubs, oldest first;
+    if that is not enough, whole turns are dropped from the front (the
+    current turn is always kept) and folded into a one-line-per-turn
+    summary. A turn is always kept or dropped as a whole, so tool calls
+    are never separated from their results, and notes of repeated reads
+    are stubbed along with the results they point at.
+
+    Args:
+        messages: Chat messages in OpenAI format
+        token_budget: Target prompt size in estimated tokens
+        keep_turns: Number of recent turns never stubbed
+
+    Returns:
+        The compacted message list (the input list is not modified)
+    """
+    if estimate_prompt_tokens(messages) <= token_budget:
+        return messages
+
+    prefix, turns = _split_turns(messages)
+    turns = [list(turn) for turn in turns]
+
+    def total() -> int:
+        return estimate_prompt_tokens(prefix) + sum(estimate_prompt_tokens(t) for t in turns)
+
+    # 1. Stub tool results of older turns, oldest first
+    for turn in turns[:max(0, len(turns) - keep_turns)]:
+        _stub_rereads(turns, _stub_tool_results(turn))
+        if total() <= token_budget:
+            break
+
+    # 2. Drop the oldest turns into the summary
+    summary_lines = []
+    if prefix and prefix[0].get("content", "").startswith(SUMMARY_HEADER):
+        summary_lines = prefix.pop(0)["content"].splitlines()[1:]
+
+    while len(turns) > 1 and total() + estimate_tokens("\n".join(summary_lines)) > token_budget:
+        dropped = turns.pop(0)
+        summary_lines.append(_summarize_turn(dropped))
+        _stub_rereads(turns, {m.get("tool_call_id") for m in dropped if m["role"] == "tool"})
+
+    if summary_lines:
+        summary_lines = summary_lines[-SUMMARY_MAX_ITEMS:]
+        prefix.insert(0, {
+            "role": "system",
+            "content": "\n".join([SUMMARY_HEADER] + summary_lines)
+        })
+
+    compacted = list(prefix)
+    for turn in turns:
+        compacted.extend(turn)
+    return compacted
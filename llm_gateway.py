@@ -0,0 +1,219 @@
+"""
+LLM Gateway - Shared LLM client with admission control
+Wraps the OpenAI-compatible client with explicit connection-pool sizing,
+a global in-flight limit and a fair per-session queue
+"""
+import os
+import time
+import asyncio
+import importlib.util
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Deque, Optional
+
+import httpx
+
+import metrics
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+# Connection pool settings
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "true").lower() in ("1", "true", "yes")
+
+# Admission control settings
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "32"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "128"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+
+
+class LLMBusyError(Exception):
+    """Raised when the gateway rejects a request instead of queuing it"""
+
+
+class LLMGateway:
+    """
+    Process-wide gateway to the LLM endpoint.
+
+    At most `max_in_flight` requests hold a slot at once. Further requests
+    wait in a queue per chat session, and free slots are handed out round
+    robin across sessions, so one session sending many requests cannot
+    starve the others. When the queue is full, or a request has waited
+    longer than `queue_timeout`, it is rejected with LLMBusyError instead
+    of slowing every session down.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        max_connections: int = LLM_MAX_CONNECTIONS,
+        max_keepalive: int = LLM_MAX_KEEPALIVE,
+        keepalive_expiry: float = LLM_KEEPALIVE_EXPIRY,
+        http2: bool = LLM_HTTP2,
+        max_in_flight: int = LLM_MAX_IN_FLIGHT,
+        max_queue: int = LLM_MAX_QUEUE,
+        queue_timeout: float = LLM_QUEUE_TIMEOUT
+    ):
+        """
+        Initialize the gateway.
+
+        Args:
+            api_key: API key of the endpoint
+            base_url: Base URL of the OpenAI-compatible endpoint
+            max_connections: Connection pool size
+            max_keepalive: Idle connections kept open
+            keepalive_expiry: Seconds an idle connection is kept
+            http2: Use HTTP/2 if the h2 package is installed
+            max_in_flight: Requests allowed to run at once
+            max_queue: Requests allowed to wait for a slot
+            queue_timeout: Seconds a request may wait for a slot
+        """
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+        self.http_client = httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive,
+                keepalive_expiry=keepalive_expiry
+            ),
+            timeout=httpx.Timeout(600.0, connect=10.0)
+        )
+        self.api_key = api_key
+        self.base_url = base_url
+        self._client: Optional["AsyncOpenAI"] = None
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.queued = 0
+        # Waiters per session, in round-robin order
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+    @property
+    def client(self) -> "AsyncOpenAI":
+        """Client of the gateway's own endpoint, created on first use"""
+        if self._client is None:
+            self._client = self.client_for(self.api_key, self.base_url)
+        return self._client
+
+    def client_for(self, api_key: Optional[str] = None, base_url: Optional[str] = None) -> "AsyncOpenAI":
+        """
+        Get a client for another endpoint that shares this gateway's pool.
+
+        Requests made with it go through the same connection pool and, when
+        wrapped in slot(), the same admission control.
+
+        Args:
+            api_key: API key of the endpoint
+            base_url: Base URL of the OpenAI-compatible endpoint
+
+        Returns:
+            An AsyncOpenAI client
+        """
+        # Imported on first use: openai is slow to import (see
+        # benchmarks/bench_startup.py)
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=self.http_client)
+
+    def _update_gauges(self) -> None:
+        metrics.LLM_IN_FLIGHT.set(self.in_flight)
+        metrics.LLM_QUEUE_DEPTH.set(self.queued)
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiting sessions, one request per session in turn"""
+        while self.in_flight < self.max_in_flight and self._queues:
+            session_id, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            self.queued -= 1
+            if queue:
+                self._queues.move_to_end(session_id)
+            else:
+                del self._queues[session_id]
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+        self._update_gauges()
+
+    async def acquire(self, session_id: str) -> float:
+        """
+        Wait for a slot.
+
+        Args:
+            session_id: Chat session the request belongs to
+
+        Returns:
+            Seconds spent waiting in the queue
+
+        Raises:
+            LLMBusyError: The queue is full or the wait timed out
+        """
+        if self.in_flight < self.max_in_flight and not self.queued:
+            self.in_flight += 1
+            self._update_gauges()
+            return 0.0
+
+        if self.queued >= self.max_queue:
+            metrics.LLM_REJECTED.inc(reason="queue_full")
+            raise LLMBusyError(f"LLM queue is full ({self.queued} requests waiting)")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(session_id, deque()).append(waiter)
+        self.queued += 1
+        self._update_gauges()
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except BaseException as e:
+            queue = self._queues.get(session_id)
+            if queue is not None and waiter in queue:
+                queue.remove(waiter)
+                self.queued -= 1
+                if not queue:
+                    del self._queues[session_id]
+                self._update_gauges()
+            elif waiter.done() and not waiter.cancelled():
+                # The slot was handed over just before the wait was abandoned
+                self.release()
+            if isinstance(e, asyncio.TimeoutError):
+                metrics.LLM_REJECTED.inc(reason="queue_timeout")
+                raise LLMBusyError(
+                    f"No LLM slot became free within {self.queue_timeout:g} seconds"
+                ) from None
+            raise
+
+        waited = time.perf_counter() - started
+        if metrics.should_sample():
+            metrics.LLM_QUEUE_SECONDS.observe(waited)
+        return waited
+
+    def release(self) -> None:
+        """Return a slot and wake the next waiting session"""
+        self.in_flight -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, session_id: str) -> AsyncIterator[float]:
+        """
+        Hold a slot for the duration of one request (including its stream).
+
+        Args:
+            session_id: Chat session the request belongs to
+
+        Yields:
+            Seconds spent waiting in the queue
+        """
+        waited = await self.acquire(session_id)
+        try:
+            yield waited
+        finally:
+            self.release()
+
+    async def close(self) -> None:
+        """Close the pooled connections"""
+        await self.http_client.aclose()
@@ -3,64 +3,382 @@ MCP SSE Client
 Connects to the MCP server via SSE and provides methods to call tools
 """
 import json
+import time
+import hashlib
+import asyncio
+import itertools
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Dict, Any, List, Optional
+from urllib.parse import urljoin
 import httpx
-from httpx_sse import connect_sse
-from typing import Dict, Any, List
+from httpx_sse import connect_sse, aconnect_sse
+
+# MCP protocol revision sent in the initialize handshake
+MCP_PROTOCOL_VERSION = "2024-11-05"
+
+
+def _extract_text(result: Dict[str, Any]) -> Optional[str]:
+    """Extract the text content from a tools/call result"""
+    content = result.get("content", [])
+    if content and len(content) > 0:
+        return content[0].get("text", "")
+    return None
+
+
+def _to_openai_tools(mcp_tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Convert MCP tool definitions to OpenAI function calling format"""
+    openai_tools = []
+
+    for tool in mcp_tools:
+        openai_tool = {
+            "type": "function",
+            "function": {
+                "name": tool["name"],
+                "description": tool.get("description", ""),
+                "parameters": tool.get("inputSchema", {
+                    "type": "object",
+                    "properties": {},
+                    "required": []
+                })
+            }
+        }
+        openai_tools.append(openai_tool)
+
+    return openai_tools
+
+
+class ToolCatalog:
+    """
+    Cached tool list of an MCP server.
+
+    Entries expire after `ttl` seconds or when the server announces
+    notifications/tools/list_changed. Failed refreshes, and refreshes that
+    return no tools, are cached too: the last known tools (or an empty
+    list) are served until a retry is due, with the retry delay doubling
+    on each consecutive failure. The OpenAI tool payload is built and
+    serialized once per tool list and tagged with an etag that changes
+    only when the tools do.
+    """
+
+    def __init__(self, ttl: float = 300.0, error_backoff: float = 1.0, max_error_backoff: float = 60.0):
+        """
+        Initialize the tool catalog.
+
+        Args:
+            ttl: Seconds a tool list stays fresh
+            error_backoff: Seconds to wait before retrying after a failure
+            max_error_backoff: Upper bound for the retry delay
+        """
+        self.ttl = ttl
+        self.error_backoff = error_backoff
+        self.max_error_backoff = max_error_backoff
+        self.tools: Optional[List[Dict[str, Any]]] = None
+        self.openai_tools: List[Dict[str, Any]] = []
+        self.openai_tools_json = "[]"
+        self.etag = ""
+        self.version = 0
+        self.failures = 0
+        self._expires_at = 0.0
+
+    def is_fresh(self) -> bool:
+        """Check whether the cached list (or a cached failure) can be served"""
+        return time.monotonic() < self._expires_at
+
+    def update(self, tools: List[Dict[str, Any]]) -> None:
+        """
+        Store a freshly listed set of tools.
+
+        An empty list (e.g. from a server that is still starting) is
+        treated as a failed refresh: the last known tools are kept and the
+        list is retried after the error backoff instead of the full TTL.
+        """
+        if not tools:
+            self.record_failure()
+            return
+        openai_tools = _to_openai_tools(tools)
+        openai_tools_json = json.dumps(openai_tools, sort_keys=True, ensure_ascii=False)
+        etag = hashlib.sha256(openai_tools_json.encode("utf-8")).hexdigest()[:16]
+        if etag != self.etag:
+            self.openai_tools = openai_tools
+            self.openai_tools_json = openai_tools_json
+            self.etag = etag
+            self.version += 1
+        self.tools = tools
+        self.failures = 0
+        self._expires_at = time.monotonic() + self.ttl
+
+    def record_failure(self) -> None:
+        """Remember a failed refresh so the server is not retried immediately"""
+        self.failures += 1
+        delay = min(self.error_backoff * 2 ** (self.failures - 1), self.max_error_backoff)
+        self._expires_at = time.monotonic() + delay
+
+    def invalidate(self) -> None:
+        """Force the next lookup to list tools again"""
+        self._expires_at = 0.0
 
 
 class MCPClient:
-    """Client for communicating with MCP server via SSE"""
+    """
+    Client for communicating with MCP server via SSE.
+
+    A single long-lived SSE session is shared by all requests. Requests are
+    POSTed over a pooled connection with unique JSON-RPC ids, and a
+    background reader thread routes each response on the SSE stream back to
+    the waiting caller, so many calls can be in flight at once. A dropped
+    session is re-established on the next request with exponential backoff.
+    """
 
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        max_connections: int = 10,
+        keepalive_timeout: float = 60.0,
+        max_retries: int = 3,
+        tools_ttl: float = 300.0
+    ):
         """
         Initialize the MCP client.
 
         Args:
             base_url: Base URL of the MCP server
+            max_connections: Size of the HTTP connection pool
+            keepalive_timeout: Seconds without any data (events or server
+                pings) after which the SSE session is considered dead
+            max_retries: Connection attempts before a request fails
+            tools_ttl: Seconds the tool list is cached
         """
         self.base_url = base_url
         self.sse_url = f"{base_url}/sse"
-        self.tools_cache = None
+        self.catalog = ToolCatalog(ttl=tools_ttl)
+        self.keepalive_timeout = keepalive_timeout
+        self.max_retries = max_retries
+
+        self._http = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            timeout=httpx.Timeout(10.0)
+        )
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._session_lock = threading.Lock()
+        self._catalog_lock = threading.Lock()
+        self._endpoint: Optional[str] = None
+        self._endpoint_ready = threading.Event()
+        self._reader: Optional[threading.Thread] = None
+        self._response: Optional[httpx.Response] = None
+        self._closed = False
+
+    def __enter__(self) -> "MCPClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the SSE session and the connection pool"""
+        self._closed = True
+        response = self._response
+        if response is not None:
+            response.close()
+        if self._reader is not None:
+            self._reader.join(timeout=5.0)
+        self._http.close()
+
+    def _read_events(self) -> None:
+        """Background reader: route SSE messages until the session drops"""
+        error: Exception = ConnectionError("MCP session closed")
+        try:
+            with connect_sse(
+                self._http,
+                "GET",
+                self.sse_url,
+                timeout=httpx.Timeout(10.0, read=self.keepalive_timeout)
+            ) as event_source:
+                self._response = event_source.response
+                for sse in event_source.iter_sse():
+                    if sse.event == "endpoint":
+                        self._endpoint = urljoin(self.base_url, sse.data)
+                        self._endpoint_ready.set()
+                    elif sse.data:
+                        self._dispatch(json.loads(sse.data))
+        except Exception as e:
+            if not self._closed:
+                error = ConnectionError(f"MCP session lost: {e}")
+        finally:
+            self._response = None
+            self._endpoint = None
+            self._endpoint_ready.set()
+            self._fail_pending(error)
+
+    def _dispatch(self, message: Dict[str, Any]) -> None:
+        """Handle one JSON-RPC message received on the SSE stream"""
+        if "method" in message:
+            # Server-initiated request or notification
+            if message["method"] == "ping" and "id" in message:
+                self._post({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+            elif message["method"] == "notifications/tools/list_changed":
+                self.catalog.invalidate()
+            return
+
+        with self._lock:
+            future = self._pending.pop(message.get("id"), None)
+        if future is not None and not future.done():
+            future.set_result(message)
+
+    def _fail_pending(self, error: Exception) -> None:
+        """Fail every request still waiting for a response"""
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    def _post(self, message: Dict[str, Any]) -> None:
+        """POST a JSON-RPC message to the session's message endpoint"""
+        endpoint = self._endpoint
+        if endpoint is None:
+            raise ConnectionError("MCP session is not connected")
+        response = self._http.post(endpoint, json=message)
+        response.raise_for_status()
+
+    def _connect(self) -> None:
+        """Open the SSE session and perform the MCP initialize handshake"""
+        if self._reader is not None:
+            # Let the previous reader finish so it cannot clear the new session
+            self._reader.join(timeout=5.0)
+        self._endpoint_ready.clear()
+        self._reader = threading.Thread(
+            target=self._read_events,
+            name="mcp-sse-reader",
+            daemon=True
+        )
+        self._reader.start()
+
+        if not self._endpoint_ready.wait(timeout=10.0) or self._endpoint is None:
+            raise ConnectionError(f"Could not open MCP session at {self.sse_url}")
+
+        self._send_request("initialize", {
+            "protocolVersion": MCP_PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": "chainlit-1", "version": "0.1.0"}
+        }, timeout=10.0)
+        self._post({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+    def _ensure_session(self) -> None:
+        """Make sure a session is open, reconnecting with backoff if needed"""
+        if self._endpoint is not None:
+            return
+
+        with self._session_lock:
+            if self._endpoint is not None:
+                return
+            if self._closed:
+                raise ConnectionError("MCP client is closed")
+
+            delay = 0.5
+            for attempt in range(self.max_retries):
+                try:
+                    self._connect()
+                    return
+                except Exception:
+                    if self._response is not None:
+                        self._response.close()
+                    if attempt == self.max_retries - 1:
+                        raise
+                    time.sleep(delay)
+                    delay = min(delay * 2, 10.0)
+
+    def _send_request(
+        self,
+        method: str,
+        params: Optional[Dict[str, Any]],
+        timeout: float
+    ) -> Dict[str, Any]:
+        """Send a request on the current session and wait for its response"""
+        request_id = next(self._ids)
+        future: Future = Future()
+        with self._lock:
+            self._pending[request_id] = future
+
+        request_data = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            request_data["params"] = params
+
+        try:
+            self._post(request_data)
+            response = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise httpx.TimeoutException(f"No response to {method} within {timeout:g} seconds")
+        finally:
+            with self._lock:
+                self._pending.pop(request_id, None)
+
+        if "error" in response:
+            raise RuntimeError(response["error"].get("message", str(response["error"])))
+        return response.get("result", {})
+
+    def request(
+        self,
+        method: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: float = 30.0
+    ) -> Dict[str, Any]:
+        """
+        Send a JSON-RPC request to the MCP server.
+
+        Safe to call from several threads at once; all requests share one
+        SSE session.
+
+        Args:
+            method: JSON-RPC method name
+            params: Method parameters
+            timeout: Seconds to wait for the response
+
+        Returns:
+            The "result" member of the response
+        """
+        self._ensure_session()
+        return self._send_request(method, params, timeout)
 
     def get_tools(self) -> List[Dict[str, Any]]:
         """
         Get available tools from the MCP server.
 
+        The list is served from the tool catalog while it is fresh.
+
         Returns:
             List of tool definitions
         """
-        if self.tools_cache:
-            return self.tools_cache
+        if self.catalog.is_fresh():
+            return self.catalog.tools or []
 
-        try:
-            # Request to list tools
-            request_data = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "tools/list"
-            }
+        with self._catalog_lock:
+            # Another thread may have refreshed it meanwhile
+            if self.catalog.is_fresh():
+                return self.catalog.tools or []
 
-            with httpx.Client() as client:
-                with connect_sse(
-                    client,
-                    "POST",
-                    self.sse_url,
-                    json=request_data,
-                    timeout=10.0
-                ) as event_source:
-                    for sse in event_source.iter_sse():
-                        if sse.data:
-                            response = json.loads(sse.data)
-                            if "result" in response:
-                                tools = response["result"].get("tools", [])
-                                self.tools_cache = tools
-                                return tools
+            try:
+                tools = []
+                params: Optional[Dict[str, Any]] = None
+                while True:
+                    result = self.request("tools/list", params, timeout=10.0)
+                    tools.extend(result.get("tools", []))
+                    if not result.get("nextCursor"):
+                        break
+                    params = {"cursor": result["nextCursor"]}
+                self.catalog.update(tools)
+                return self.catalog.tools or []
 
-        except Exception as e:
-            print(f"Error getting tools from MCP server: {e}")
-            return []
-
-        return []
+            except Exception as e:
+                print(f"Error getting tools from MCP server: {e}")
+                self.catalog.record_failure()
+                return self.catalog.tools or []
 
     def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> str:
         """
@@ -74,32 +392,15 @@ class MCPClient:
             The result from the tool execution
         """
         try:
-            request_data = {
-                "jsonrpc": "2.0",
-                "id": 2,
-                "method": "tools/call",
-                "params": {
-                    "name": tool_name,
-                    "arguments": arguments
-                }
-            }
+            result = self.request(
+                "tools/call",
+                {"name": tool_name, "arguments": arguments},
+                timeout=30.0
+            )
 
-            with httpx.Client() as client:
-                with connect_sse(
-                    client,
-                    "POST",
-                    self.sse_url,
-                    json=request_data,
-                    timeout=30.0
-                ) as event_source:
-                    for sse in event_source.iter_sse():
-                        if sse.data:
-                            response = json.loads(sse.data)
-                            if "result" in response:
-                                # Extract the content from the result
-                                content = response["result"].get("content", [])
-                                if content and len(content) > 0:
-                                    return content[0].get("text", "")
+            text = _extract_text(result)
+            if text is not None:
+                return text
 
         except httpx.TimeoutException:
             return "Error: Request to MCP server timed out"
@@ -112,28 +413,331 @@ class MCPClient:
         """
         Get tools in OpenAI function calling format.
 
+        The converted list is precomputed by the tool catalog; callers must
+        not modify it. `catalog.openai_tools_json` and `catalog.etag` hold the
+        serialized payload and its version tag.
+
         Returns:
             List of tool definitions in OpenAI format
         """
-        mcp_tools = self.get_tools()
-        openai_tools = []
-
-        for tool in mcp_tools:
-            openai_tool = {
-                "type": "function",
-                "function": {
-                    "name": tool["name"],
-                    "description": tool.get("description", ""),
-                    "parameters": tool.get("inputSchema", {
-                        "type": "object",
-                        "properties": {},
-                        "required": []
-                    })
-                }
-            }
-            openai_tools.append(openai_tool)
+        self.get_tools()
+        return self.catalog.openai_tools
+
+
+class AsyncMCPClient:
+    """
+    Asynchronous client for communicating with MCP server via SSE.
+
+    Same session model as MCPClient, built on httpx.AsyncClient so it can
+    be used from the Chainlit event loop without blocking it. Requests are
+    pipelined over the connection pool and their responses matched by id,
+    so a batch of tool calls costs about one round trip. The number of
+    requests in flight is bounded by `max_concurrency`.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        max_connections: int = 10,
+        max_concurrency: int = 16,
+        keepalive_timeout: float = 60.0,
+        max_retries: int = 3,
+        tools_ttl: float = 300.0
+    ):
+        """
+        Initialize the async MCP client.
+
+        Args:
+            base_url: Base URL of the MCP server
+            max_connections: Size of the HTTP connection pool
+            max_concurrency: Maximum requests in flight at once
+            keepalive_timeout: Seconds without any data (events or server
+                pings) after which the SSE session is considered dead
+            max_retries: Connection attempts before a request fails
+            tools_ttl: Seconds the tool list is cached
+        """
+        self.base_url = base_url
+        self.sse_url = f"{base_url}/sse"
+        self.catalog = ToolCatalog(ttl=tools_ttl)
+        self.keepalive_timeout = keepalive_timeout
+        self.max_retries = max_retries
+
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            timeout=httpx.Timeout(10.0)
+        )
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session_lock = asyncio.Lock()
+        self._catalog_lock = asyncio.Lock()
+        self._endpoint: Optional[str] = None
+        self._endpoint_ready = asyncio.Event()
+        self._reader: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def __aenter__(self) -> "AsyncMCPClient":
+        return self
 
-        return openai_tools
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the SSE session and the connection pool"""
+        self._closed = True
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+        await self._http.aclose()
+
+    async def _read_events(self) -> None:
+        """Background reader: route SSE messages until the session drops"""
+        error: Exception = ConnectionError("MCP session closed")
+        try:
+            async with aconnect_sse(
+                self._http,
+                "GET",
+                self.sse_url,
+                timeout=httpx.Timeout(10.0, read=self.keepalive_timeout)
+            ) as event_source:
+                async for sse in event_source.aiter_sse():
+                    if sse.event == "endpoint":
+                        self._endpoint = urljoin(self.base_url, sse.data)
+                        self._endpoint_ready.set()
+                    elif sse.data:
+                        await self._dispatch(json.loads(sse.data))
+        except Exception as e:
+            if not self._closed:
+                error = ConnectionError(f"MCP session lost: {e}")
+        finally:
+            self._endpoint = None
+            self._endpoint_ready.set()
+            self._fail_pending(error)
+
+    async def _dispatch(self, message: Dict[str, Any]) -> None:
+        """Handle one JSON-RPC message received on the SSE stream"""
+        if "method" in message:
+            # Server-initiated request or notification
+            if message["method"] == "ping" and "id" in message:
+                await self._post({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+            elif message["method"] == "notifications/tools/list_changed":
+                self.catalog.invalidate()
+            return
+
+        future = self._pending.pop(message.get("id"), None)
+        if future is not None and not future.done():
+            future.set_result(message)
+
+    def _fail_pending(self, error: Exception) -> None:
+        """Fail every request still waiting for a response"""
+        pending = list(self._pending.values())
+        self._pending.clear()
+        for future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _post(self, message: Dict[str, Any]) -> None:
+        """POST a JSON-RPC message to the session's message endpoint"""
+        endpoint = self._endpoint
+        if endpoint is None:
+            raise ConnectionError("MCP session is not connected")
+        response = await self._http.post(endpoint, json=message)
+        response.raise_for_status()
+
+    async def _connect(self) -> None:
+        """Open the SSE session and perform the MCP initialize handshake"""
+        if self._reader is not None and not self._reader.done():
+            self._reader.cancel()
+        self._endpoint_ready.clear()
+        self._reader = asyncio.create_task(self._read_events())
+
+        try:
+            await asyncio.wait_for(self._endpoint_ready.wait(), timeout=10.0)
+        except asyncio.TimeoutError:
+            pass
+        if self._endpoint is None:
+            raise ConnectionError(f"Could not open MCP session at {self.sse_url}")
+
+        await self._send_request("initialize", {
+            "protocolVersion": MCP_PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": "chainlit-1", "version": "0.1.0"}
+        }, timeout=10.0)
+        await self._post({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+    async def _ensure_session(self) -> None:
+        """Make sure a session is open, reconnecting with backoff if needed"""
+        if self._endpoint is not None:
+            return
+
+        async with self._session_lock:
+            if self._endpoint is not None:
+                return
+            if self._closed:
+                raise ConnectionError("MCP client is closed")
+
+            delay = 0.5
+            for attempt in range(self.max_retries):
+                try:
+                    await self._connect()
+                    return
+                except Exception:
+                    if self._reader is not None:
+                        self._reader.cancel()
+                    if attempt == self.max_retries - 1:
+                        raise
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, 10.0)
+
+    async def _send_request(
+        self,
+        method: str,
+        params: Optional[Dict[str, Any]],
+        timeout: float
+    ) -> Dict[str, Any]:
+        """Send a request on the current session and wait for its response"""
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+
+        request_data = {"jsonrpc": "2.0", "id": request_id, "method": method}
+        if params is not None:
+            request_data["params"] = params
+
+        try:
+            await self._post(request_data)
+            response = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise httpx.TimeoutException(f"No response to {method} within {timeout:g} seconds")
+        finally:
+            self._pending.pop(request_id, None)
+
+        if "error" in response:
+            raise RuntimeError(response["error"].get("message", str(response["error"])))
+        return response.get("result", {})
+
+    async def request(
+        self,
+        method: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: float = 30.0
+    ) -> Dict[str, Any]:
+        """
+        Send a JSON-RPC request to the MCP server.
+
+        Args:
+            method: JSON-RPC method name
+            params: Method parameters
+            timeout: Seconds to wait for the response
+
+        Returns:
+            The "result" member of the response
+        """
+        async with self._semaphore:
+            await self._ensure_session()
+            return await self._send_request(method, params, timeout)
+
+    async def get_tools(self) -> List[Dict[str, Any]]:
+        """
+        Get available tools from the MCP server.
+
+        The list is served from the tool catalog while it is fresh.
+
+        Returns:
+            List of tool definitions
+        """
+        if self.catalog.is_fresh():
+            return self.catalog.tools or []
+
+        async with self._catalog_lock:
+            # Another task may have refreshed it meanwhile
+            if self.catalog.is_fresh():
+                return self.catalog.tools or []
+
+            try:
+                tools = []
+                params: Optional[Dict[str, Any]] = None
+                while True:
+                    result = await self.request("tools/list", params, timeout=10.0)
+                    tools.extend(result.get("tools", []))
+                    if not result.get("nextCursor"):
+                        break
+                    params = {"cursor": result["nextCursor"]}
+                self.catalog.update(tools)
+                return self.catalog.tools or []
+
+            except Exception as e:
+                print(f"Error getting tools from MCP server: {e}")
+                self.catalog.record_failure()
+                return self.catalog.tools or []
+
+    async def acall_tool(self, tool_name: str, arguments: Dict[str, Any]) -> str:
+        """
+        Call a tool on the MCP server.
+
+        Args:
+            tool_name: Name of the tool to call
+            arguments: Arguments to pass to the tool
+
+        Returns:
+            The result from the tool execution
+        """
+        try:
+            result = await self.request(
+                "tools/call",
+                {"name": tool_name, "arguments": arguments},
+                timeout=30.0
+            )
+
+            text = _extract_text(result)
+            if text is not None:
+                return text
+
+        except httpx.TimeoutException:
+            return "Error: Request to MCP server timed out"
+        except Exception as e:
+            return f"Error calling tool: {str(e)}"
+
+        return "No response from MCP server"
+
+    async def call_tools_batch(self, calls: List[Dict[str, Any]]) -> List[str]:
+        """
+        Call several tools at once.
+
+        The MCP SSE transport does not accept JSON-RPC batch arrays, so the
+        requests are pipelined instead: all of them are sent without waiting
+        for earlier responses, and the results are gathered by id.
+
+        Args:
+            calls: Tool calls as {"name": ..., "arguments": {...}} dicts
+
+        Returns:
+            The result of each call, in the order of `calls`
+        """
+        return list(await asyncio.gather(*(
+            self.acall_tool(call["name"], call.get("arguments", {}))
+            for call in calls
+        )))
+
+    async def get_tools_for_llm(self) -> List[Dict[str, Any]]:
+        """
+        Get tools in OpenAI function calling format.
+
+        The converted list is precomputed by the tool catalog; callers must
+        not modify it. `catalog.openai_tools_json` and `catalog.etag` hold the
+        serialized payload and its version tag.
+
+        Returns:
+            List of tool definitions in OpenAI format
+        """
+        await self.get_tools()
+        return self.catalog.openai_tools
 
 
 def test_client():
@@ -0,0 +1,277 @@
+"""
+MCP Server Pool - Shared, warm MCP server subprocesses
+Starts each configured stdio MCP server once per process and shares its
+initialized session and LangChain tools across all chat sessions
+"""
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+if TYPE_CHECKING:
+    from langchain_core.tools import BaseTool
+
+logger = logging.getLogger(__name__)
+
+
+class _Replica:
+    """One server subprocess and its initialized session"""
+
+    def __init__(self, name: str, index: int):
+        self.name = name
+        self.index = index
+        self.session: Optional[ClientSession] = None
+        self.in_flight = 0
+        self.restarts = 0
+        self.ready = asyncio.Event()
+        # Resolved when the current process goes down
+        self.down: Optional[asyncio.Future] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.name}#{self.index}"
+
+
+class _ServerRouter:
+    """
+    Session stand-in handed to load_mcp_tools.
+
+    Tools built on it send every call to the healthy replica with the
+    fewest calls in flight, so one set of tools serves all replicas and
+    survives replica restarts.
+    """
+
+    def __init__(self, replicas: List[_Replica], call_timeout: float):
+        self.replicas = replicas
+        self.call_timeout = call_timeout
+
+    async def _pick(self) -> _Replica:
+        """Get the least busy healthy replica, waiting briefly if all are down"""
+        healthy = [r for r in self.replicas if r.session is not None]
+        if not healthy:
+            waiters = [asyncio.create_task(r.ready.wait()) for r in self.replicas]
+            try:
+                await asyncio.wait(waiters, timeout=self.call_timeout, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+            healthy = [r for r in self.replicas if r.session is not None]
+            if not healthy:
+                raise ConnectionError(f"No healthy replica of MCP server {self.replicas[0].name}")
+        return min(healthy, key=lambda r: r.in_flight)
+
+    async def list_tools(self, *args: Any, **kwargs: Any) -> Any:
+        replica = await self._pick()
+        return await replica.session.list_tools(*args, **kwargs)
+
+    async def call_tool(self, *args: Any, **kwargs: Any) -> Any:
+        replica = await self._pick()
+        down = replica.down
+        call = asyncio.ensure_future(replica.session.call_tool(*args, **kwargs))
+        replica.in_flight += 1
+        try:
+            # A call to a crashed process would never get its response
+            await asyncio.wait({call, down}, return_when=asyncio.FIRST_COMPLETED)
+            if not call.done():
+                raise ConnectionError(f"MCP server {replica.label} went down during the call")
+            return call.result()
+        finally:
+            replica.in_flight -= 1
+            call.cancel()
+
+
+class MCPServerPool:
+    """
+    Process-wide pool of stdio MCP servers.
+
+    Each replica runs in its own long-lived task that owns the subprocess
+    and its ClientSession (the MCP client contexts must be entered and
+    exited in the same task). Replicas are pinged periodically; a replica
+    that crashes or stops answering is restarted with exponential backoff
+    while calls are routed to the remaining replicas. ClientSession
+    multiplexes concurrent requests by id, so chat sessions share a replica
+    without queuing behind each other.
+
+    All servers start concurrently. start() returns once every required
+    server is up or has exceeded its startup timeout; servers that are
+    still starting keep going in the background and attach their tools
+    (bumping `tools_version`) as soon as they are ready.
+    """
+
+    def __init__(
+        self,
+        servers: Dict[str, StdioServerParameters],
+        replicas: int = 1,
+        required: Optional[List[str]] = None,
+        startup_timeout: float = 30.0,
+        health_interval: float = 30.0,
+        call_timeout: float = 30.0
+    ):
+        """
+        Initialize the pool (no process is started until start()).
+
+        Args:
+            servers: Server parameters by server name
+            replicas: Processes to run per server
+            required: Servers start() waits for (default: all)
+            startup_timeout: Seconds start() waits for each required server
+            health_interval: Seconds between health-check pings
+            call_timeout: Seconds a call waits for a healthy replica
+        """
+        self.servers = servers
+        self.health_interval = health_interval
+        self.call_timeout = call_timeout
+        self.required = set(servers) if required is None else set(required)
+        self.startup_timeout = startup_timeout
+        self.startup_times: Dict[str, float] = {}
+        self.tools_version = 0
+        self._replicas: Dict[str, List[_Replica]] = {
+            name: [_Replica(name, i) for i in range(max(1, replicas))]
+            for name in servers
+        }
+        self._tools: Dict[str, List["BaseTool"]] = {}
+        self._start_task: Optional[asyncio.Task] = None
+        self._server_tasks: Dict[str, asyncio.Task] = {}
+        self._closing = False
+
+    async def start(self) -> None:
+        """
+        Start all servers and load their tools.
+
+        Safe to call from every chat session: the servers are started only
+        by the first call, later calls wait for that startup to finish.
+        """
+        if self._start_task is None:
+            self._start_task = asyncio.create_task(self._start())
+        await asyncio.shield(self._start_task)
+
+    async def _start(self) -> None:
+        started = time.perf_counter()
+        for name in self.servers:
+            self._server_tasks[name] = asyncio.create_task(self._start_server(name, started))
+
+        required = [self._server_tasks[name] for name in self.required if name in self._server_tasks]
+        if required:
+            await asyncio.wait(required, timeout=self.startup_timeout)
+
+        for name in self.required:
+            if name not in self._tools:
+                logger.warning(
+                    "MCP server %s not ready after %.0fs, continuing without it",
+                    name, self.startup_timeout
+                )
+
+    async def _start_server(self, name: str, started: float) -> None:
+        """Start one server's replicas and attach its tools once it is up"""
+        replicas = self._replicas[name]
+        for replica in replicas:
+            replica.task = asyncio.create_task(self._run_replica(replica))
+
+        router = _ServerRouter(replicas, self.call_timeout)
+        backoff = 1.0
+        while not self._closing:
+            waiters = [asyncio.create_task(r.ready.wait()) for r in replicas]
+            try:
+                await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+
+            try:
+                # Imported here: LangChain is only needed once a server is up
+                from langchain_mcp_adapters.tools import load_mcp_tools
+                self._tools[name] = await load_mcp_tools(router, server_name=name)
+                break
+            except Exception as e:
+                logger.warning("Loading tools of MCP server %s failed: %s", name, e)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+
+        if name not in self._tools:
+            return
+        self.tools_version += 1
+        self.startup_times[name] = time.perf_counter() - started
+        logger.info(
+            "MCP server %s attached %d tools after %.2fs",
+            name, len(self._tools[name]), self.startup_times[name]
+        )
+
+    async def _run_replica(self, replica: _Replica) -> None:
+        """Own one replica: start it, health-check it, restart it when it fails"""
+        params = self.servers[replica.name]
+        backoff = 1.0
+        while not self._closing:
+            started = time.perf_counter()
+            try:
+                async with stdio_client(params) as (read, write):
+                    async with ClientSession(read, write) as session:
+                        await session.initialize()
+                        replica.down = asyncio.get_running_loop().create_future()
+                        replica.session = session
+                        replica.ready.set()
+                        backoff = 1.0
+                        logger.info(
+                            "MCP server %s ready in %.2fs",
+                            replica.label, time.perf_counter() - started
+                        )
+                        while not self._closing:
+                            await asyncio.sleep(self.health_interval)
+                            await asyncio.wait_for(session.send_ping(), timeout=10.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("MCP server %s failed: %s", replica.label, e)
+            finally:
+                replica.session = None
+                replica.ready.clear()
+                if replica.down is not None and not replica.down.done():
+                    replica.down.set_result(None)
+
+            if self._closing:
+                break
+            replica.restarts += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+    def get_tools(self) -> List["BaseTool"]:
+        """
+        Get the LangChain tools of all servers.
+
+        Returns:
+            Tools shared by every chat session
+        """
+        return [tool for tools in self._tools.values() for tool in tools]
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Get startup time, tool count and replica health of every server"""
+        return {
+            name: {
+                "required": name in self.required,
+                "startup_seconds": self.startup_times.get(name),
+                "tools": len(self._tools.get(name, [])),
+                "replicas": [
+                    {
+                        "healthy": r.session is not None,
+                        "in_flight": r.in_flight,
+                        "restarts": r.restarts,
+                    }
+                    for r in replicas
+                ],
+            }
+            for name, replicas in self._replicas.items()
+        }
+
+    async def close(self) -> None:
+        """Stop all server processes"""
+        self._closing = True
+        tasks = list(self._server_tasks.values()) + [
+            r.task for replicas in self._replicas.values() for r in replicas
+            if r.task is not None
+        ]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
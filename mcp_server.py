@@ -4,85 +4,226 @@ MCP Server with File Reading Tool
 Exposes file reading functionality via FastMCP SSE
 """
 import os
-from pathlib import Path
+import asyncio
+from typing import Any, Dict, List, Optional
 from fastmcp import FastMCP
+import mcp_tools
+
+# Server limits. Filesystem work runs on mcp_tools' bounded thread pool
+# (TOOL_WORKERS), never on the event loop serving the SSE clients.
+MCP_SERVER_MAX_CALLS = int(os.getenv("MCP_SERVER_MAX_CALLS", "64"))
+MCP_SERVER_MAX_RESPONSE_BYTES = int(os.getenv("MCP_SERVER_MAX_RESPONSE_BYTES", "1000000"))
+MCP_SERVER_CALL_TIMEOUT = float(os.getenv("MCP_SERVER_CALL_TIMEOUT", "30"))
 
 # Initialize FastMCP server
 mcp = FastMCP("File Reader MCP Server")
 
+# Calls allowed to run at once; later calls wait for a slot
+_call_slots = asyncio.Semaphore(MCP_SERVER_MAX_CALLS)
+
+
+def _cap_response(result: str) -> str:
+    """Truncate a response to MCP_SERVER_MAX_RESPONSE_BYTES"""
+    data = result.encode("utf-8")
+    if len(data) <= MCP_SERVER_MAX_RESPONSE_BYTES:
+        return result
+    head = data[:MCP_SERVER_MAX_RESPONSE_BYTES].decode("utf-8", errors="ignore")
+    return (
+        f"{head}\n[... response truncated by the server at "
+        f"{MCP_SERVER_MAX_RESPONSE_BYTES} of {len(data)} bytes ...]"
+    )
+
+
+async def _run_tool(tool_name: str, arguments: Dict[str, Any]) -> str:
+    """
+    Run an mcp_tools tool within the server limits.
+
+    The whole call, including the wait for a free slot, is bounded by
+    MCP_SERVER_CALL_TIMEOUT.
+
+    Args:
+        tool_name: Name of the tool in mcp_tools.TOOLS
+        arguments: Arguments to pass to the tool
+
+    Returns:
+        The (possibly truncated) tool result, or an error message
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + MCP_SERVER_CALL_TIMEOUT
+    try:
+        await asyncio.wait_for(_call_slots.acquire(), MCP_SERVER_CALL_TIMEOUT)
+    except asyncio.TimeoutError:
+        return f"Error: Server busy, {tool_name} could not start within {MCP_SERVER_CALL_TIMEOUT:g} seconds"
+
+    try:
+        result = await mcp_tools.acall_tool(
+            tool_name,
+            arguments,
+            timeout=max(0.0, deadline - loop.time())
+        )
+    finally:
+        _call_slots.release()
+    return _cap_response(result)
+
 
 @mcp.tool()
-def read_file(file_path: str) -> str:
+async def read_file(
+    file_path: str,
+    offset: Optional[int] = None,
+    length: Optional[int] = None,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    max_bytes: Optional[int] = None
+) -> str:
     """
-    Read the contents of a file.
+    Read the contents of a file, or a byte or line window of a large file.
 
     Args:
         file_path: Path to the file to read (absolute or relative)
+        offset: Byte offset to start reading from (default: 0)
+        length: Number of bytes to read from offset (default: to the end)
+        start_line: First line to read, 1-based (takes precedence over offset)
+        end_line: Last line to read, inclusive (default: to the end)
+        max_bytes: Maximum bytes to return; longer output is truncated with
+            a marker telling where to continue
 
     Returns:
         The contents of the file as a string
+    """
+    # Shares the memory-mapped reader and line index with the in-app tools.
+    # Capping max_bytes keeps read_file's own continuation marker intact.
+    max_bytes = min(max_bytes or mcp_tools.READ_MAX_BYTES, MCP_SERVER_MAX_RESPONSE_BYTES)
+    return await _run_tool("read_file", {
+        "file_path": file_path,
+        "offset": offset,
+        "length": length,
+        "start_line": start_line,
+        "end_line": end_line,
+        "max_bytes": max_bytes,
+    })
 
-    Raises:
-        FileNotFoundError: If the file doesn't exist
-        PermissionError: If the file can't be read
+
+@mcp.tool()
+async def read_file_relevant(
+    file_path: str,
+    query: str,
+    top_k: Optional[int] = None,
+    max_tokens: Optional[int] = None
+) -> str:
     """
-    try:
-        # Convert to Path object for better handling
-        path = Path(file_path)
+    Read only the parts of a large file that are relevant to a question.
 
-        # Check if file exists
-        if not path.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
+    Args:
+        file_path: Path to the file to read (absolute or relative)
+        query: The user's question or keywords, in the language of the file
+        top_k: Maximum number of chunks to return (default: 5)
+        max_tokens: Token budget of the returned text (default: 2000)
 
-        # Check if it's actually a file (not a directory)
-        if not path.is_file():
-            raise ValueError(f"Path is not a file: {file_path}")
+    Returns:
+        The best-matching chunks with their line numbers
+    """
+    return await _run_tool("read_file_relevant", {
+        "file_path": file_path,
+        "query": query,
+        "top_k": top_k,
+        "max_tokens": max_tokens,
+    })
 
-        # Read the file
-        with open(path, 'r', encoding='utf-8') as f:
-            content = f.read()
 
-        return content
+@mcp.tool()
+async def read_files(
+    file_paths: Optional[List[str]] = None,
+    pattern: Optional[str] = None,
+    max_bytes: Optional[int] = None
+) -> str:
+    """
+    Read several files in one call, given as a list of paths or a glob pattern.
+
+    Args:
+        file_paths: Paths of the files to read (absolute or relative)
+        pattern: Glob pattern of files to read, e.g. "config/*.yaml" or "src/**/*.py"
+        max_bytes: Total bytes to return across all files; larger files are
+            truncated with a marker telling where to continue
 
-    except FileNotFoundError as e:
-        return f"Error: {str(e)}"
-    except PermissionError:
-        return f"Error: Permission denied to read file: {file_path}"
-    except UnicodeDecodeError:
-        return f"Error: File is not a text file or uses unsupported encoding: {file_path}"
-    except Exception as e:
-        return f"Error reading file: {str(e)}"
+    Returns:
+        Each file's contents (or error) under a "=== path ===" header
+    """
+    # The files are read in parallel on mcp_tools' read_files pool
+    max_bytes = min(max_bytes or mcp_tools.READ_FILES_MAX_BYTES, MCP_SERVER_MAX_RESPONSE_BYTES)
+    return await _run_tool("read_files", {
+        "file_paths": file_paths,
+        "pattern": pattern,
+        "max_bytes": max_bytes,
+    })
 
 
 @mcp.tool()
-def list_files(directory_path: str = ".") -> str:
+async def list_files(
+    directory_path: str = ".",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    recursive: bool = False,
+    max_depth: Optional[int] = None,
+    include: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None
+) -> str:
     """
-    List files in a directory.
+    List files in a directory, optionally recursively and page by page.
 
     Args:
         directory_path: Path to the directory to list (default: current directory)
+        limit: Maximum number of entries to return
+        cursor: Cursor from a previous call to fetch the next page
+        recursive: Also list the contents of subdirectories (default: false)
+        max_depth: Directory levels to walk when recursive (default: unlimited)
+        include: Glob patterns of entries to list, e.g. ["*.py"]
+        exclude: Glob patterns of entries to skip, e.g. [".git", "node_modules"]
 
     Returns:
         A list of files and directories as a formatted string
     """
-    try:
-        path = Path(directory_path)
+    return await _run_tool("list_files", {
+        "directory_path": directory_path,
+        "limit": limit,
+        "cursor": cursor,
+        "recursive": recursive,
+        "max_depth": max_depth,
+        "include": include,
+        "exclude": exclude,
+    })
 
-        if not path.exists():
-            raise FileNotFoundError(f"Directory not found: {directory_path}")
 
-        if not path.is_dir():
-            raise ValueError(f"Path is not a directory: {directory_path}")
-
-        items = []
-        for item in sorted(path.iterdir()):
-            item_type = "DIR" if item.is_dir() else "FILE"
-            items.append(f"[{item_type}] {item.name}")
+@mcp.tool()
+async def search_files(
+    query: str,
+    regex: bool = False,
+    ignore_case: bool = False,
+    include: Optional[List[str]] = None,
+    max_results: int = 50,
+    context_lines: int = 1
+) -> str:
+    """
+    Search file contents for text or a regular expression.
 
-        return "\n".join(items) if items else "Directory is empty"
+    Args:
+        query: Text to find, or a regular expression if regex is true
+        regex: Treat the query as a regular expression (default: false)
+        ignore_case: Match case-insensitively (default: false)
+        include: Glob patterns of relative paths to search, e.g. ["*.py"]
+        max_results: Maximum number of matching lines to return (default: 50)
+        context_lines: Lines of context around each match (default: 1)
 
-    except Exception as e:
-        return f"Error listing directory: {str(e)}"
+    Returns:
+        Matches as "path:line: text" with context lines as "path-line- text"
+    """
+    return await _run_tool("search_files", {
+        "query": query,
+        "regex": regex,
+        "ignore_case": ignore_case,
+        "include": include,
+        "max_results": max_results,
+        "context_lines": context_lines,
+    })
 
 
 if __name__ == "__main__":
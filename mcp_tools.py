@@ -3,52 +3,983 @@ MCP Tools - File Reading Tools
 Direct tool implementations for use in Chainlit app
 """
 import os
+import re
+import sys
+import mmap
+import stat
+import time
+import glob
+import heapq
+import codecs
+import asyncio
+import functools
+import threading
+from collections import OrderedDict
+from fnmatch import fnmatch
+from itertools import accumulate
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
+import metrics
+from history import estimate_tokens
+from relevance import ChunkIndex
+from search_index import SearchIndex
 
+# Async tool runtime settings
+TOOL_WORKERS = int(os.getenv("TOOL_WORKERS", "8"))
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT", "30"))
 
-def read_file(file_path: str) -> str:
+# Bounded thread pool for synchronous tools, created on first use
+_executor: Optional[ThreadPoolExecutor] = None
+
+# read_file settings
+READ_MAX_BYTES = int(os.getenv("READ_MAX_BYTES", "200000"))
+READ_MAX_CHARS = int(os.getenv("READ_MAX_CHARS", "200000"))
+READ_FALLBACK_ENCODINGS = [
+    e.strip() for e in os.getenv("READ_FALLBACK_ENCODINGS", "cp949").split(",") if e.strip()
+]
+READ_SNIFF_BYTES = 8192
+READ_HEX_PREVIEW_BYTES = 64
+LINE_INDEX_STRIDE = 1000
+LINE_INDEX_MAX_FILES = 128
+_SCAN_CHUNK = 1 << 20
+
+# read_file_relevant settings
+RELEVANT_TOP_K = int(os.getenv("RELEVANT_TOP_K", "5"))
+RELEVANT_MAX_TOKENS = int(os.getenv("RELEVANT_MAX_TOKENS", "2000"))
+RELEVANT_MAX_FILE_BYTES = int(os.getenv("RELEVANT_MAX_FILE_BYTES", str(32 * 1024 * 1024)))
+CHUNK_INDEX_MAX_FILES = 32
+
+# read_files settings
+READ_FILES_MAX_FILES = int(os.getenv("READ_FILES_MAX_FILES", "20"))
+READ_FILES_MAX_BYTES = int(os.getenv("READ_FILES_MAX_BYTES", "200000"))
+READ_FILES_WORKERS = int(os.getenv("READ_FILES_WORKERS", "4"))
+
+# Thread pool reading the files of a read_files call, created on first use
+# (separate from the tool pool, which runs read_files itself)
+_read_files_executor: Optional[ThreadPoolExecutor] = None
+_read_files_executor_lock = threading.Lock()
+
+# list_files settings
+LIST_MAX_ENTRIES = int(os.getenv("LIST_MAX_ENTRIES", "1000"))
+
+# search_files settings
+SEARCH_ROOT = os.getenv("SEARCH_ROOT", ".")
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", ".search_index.db")
+SEARCH_MAX_FILE_BYTES = int(os.getenv("SEARCH_MAX_FILE_BYTES", str(1024 * 1024)))
+SEARCH_REFRESH_SECONDS = float(os.getenv("SEARCH_REFRESH_SECONDS", "30"))
+
+# Search index over SEARCH_ROOT, opened on first use
+_search_index: Optional[SearchIndex] = None
+_search_index_lock = threading.Lock()
+
+# read_file content cache settings
+READ_CACHE_BYTES = int(os.getenv("READ_CACHE_BYTES", str(64 * 1024 * 1024)))
+READ_CACHE_MAX_ENTRY_BYTES = int(os.getenv("READ_CACHE_MAX_ENTRY_BYTES", str(1024 * 1024)))
+
+# Sparse line-offset tables, keyed by (device, inode)
+_line_indexes: "OrderedDict[Tuple[int, int], _LineIndex]" = OrderedDict()
+_line_index_lock = threading.Lock()
+
+# BM25 chunk indexes for read_file_relevant, keyed by (device, inode)
+_chunk_indexes: "OrderedDict[Tuple[int, int], Tuple[Tuple[int, int], ChunkIndex]]" = OrderedDict()
+_chunk_index_lock = threading.Lock()
+
+
+class _ReadCache:
+    """
+    Process-wide LRU cache of decoded read_file results.
+
+    Keys include the file's identity, st_mtime_ns and st_size, so a changed
+    file never hits a stale entry; older versions of a file are dropped as
+    soon as a newer version is cached.
+    """
+
+    def __init__(self, max_bytes: int, max_entry_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[tuple, Tuple[str, int]]" = OrderedDict()
+        # (device, inode) -> (mtime_ns, size, keys) of the cached version
+        self._files: Dict[Tuple[int, int], Tuple[int, int, set]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[str]:
+        """Look up a cached result, counting the hit or miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: tuple, content: str, size: int) -> None:
+        """Store a result of `size` bytes unless it exceeds the per-entry ceiling"""
+        if size > self.max_entry_bytes or size > self.max_bytes:
+            return
+
+        file_id, version = key[:2], key[2:4]
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            cached_file = self._files.get(file_id)
+            if cached_file is not None and cached_file[:2] != version:
+                for stale_key in list(cached_file[2]):
+                    self._remove(stale_key)
+                cached_file = None
+            if cached_file is None:
+                cached_file = (*version, set())
+                self._files[file_id] = cached_file
+
+            self._entries[key] = (content, size)
+            cached_file[2].add(key)
+            self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def _remove(self, key: tuple) -> None:
+        """Drop one entry (caller holds the lock)"""
+        _, size = self._entries.pop(key)
+        self.current_bytes -= size
+        file_id = key[:2]
+        keys = self._files[file_id][2]
+        keys.discard(key)
+        if not keys:
+            del self._files[file_id]
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._files.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Get counters for monitoring"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+class _LineIndex:
+    """Sparse line-offset table for one file version"""
+
+    def __init__(self, version: Tuple[int, int]):
+        self.version = version
+        # checkpoints[i] is the byte offset of line i * LINE_INDEX_STRIDE + 1
+        self.checkpoints = [0]
+        # Scan position and newlines seen there since the last checkpoint
+        self.scan_pos = 0
+        self.pending_lines = 0
+        self.complete = False
+        self.lock = threading.Lock()
+
+
+_read_cache = _ReadCache(READ_CACHE_BYTES, READ_CACHE_MAX_ENTRY_BYTES)
+
+
+def get_read_cache_stats() -> Dict[str, int]:
+    """
+    Get read_file cache counters for monitoring.
+
+    Returns:
+        Hits, misses, evictions, entry count and cached bytes
+    """
+    return _read_cache.stats()
+
+
+def _get_line_index(st: os.stat_result) -> _LineIndex:
+    """Get the cached line index for a file, discarding it if the file changed"""
+    key = (st.st_dev, st.st_ino)
+    version = (st.st_mtime_ns, st.st_size)
+    with _line_index_lock:
+        index = _line_indexes.get(key)
+        if index is None or index.version != version:
+            index = _LineIndex(version)
+            _line_indexes[key] = index
+        _line_indexes.move_to_end(key)
+        while len(_line_indexes) > LINE_INDEX_MAX_FILES:
+            _line_indexes.popitem(last=False)
+    return index
+
+
+def _extend_line_index(mm: mmap.mmap, index: _LineIndex, checkpoint: int) -> None:
+    """Scan forward in chunks until `checkpoint` is indexed or EOF is reached"""
+    size = len(mm)
+    while len(index.checkpoints) <= checkpoint and not index.complete:
+        pos = index.scan_pos
+        chunk_end = min(pos + _SCAN_CHUNK, size)
+        chunk = mm[pos:chunk_end]
+        newlines = chunk.count(b"\n")
+        needed = LINE_INDEX_STRIDE - index.pending_lines
+
+        if newlines >= needed:
+            # lengths[i] + i + 1 is the chunk offset just past the i-th newline
+            lengths = list(accumulate(map(len, chunk.split(b"\n"))))
+            for i in range(needed - 1, newlines, LINE_INDEX_STRIDE):
+                index.checkpoints.append(pos + lengths[i] + i + 1)
+            index.pending_lines = (newlines - needed) % LINE_INDEX_STRIDE
+        else:
+            index.pending_lines += newlines
+
+        index.scan_pos = chunk_end
+        if chunk_end >= size:
+            index.complete = True
+
+
+def _line_offset(mm: mmap.mmap, index: _LineIndex, line: int) -> Optional[int]:
+    """
+    Get the byte offset where a 1-based line starts.
+
+    Returns:
+        The offset, or None if the file has fewer lines
+    """
+    checkpoint = (line - 1) // LINE_INDEX_STRIDE
+    with index.lock:
+        _extend_line_index(mm, index, checkpoint)
+        checkpoint = min(checkpoint, len(index.checkpoints) - 1)
+        pos = index.checkpoints[checkpoint]
+
+    current = checkpoint * LINE_INDEX_STRIDE + 1
+    while current < line:
+        pos = mm.find(b"\n", pos)
+        if pos == -1:
+            return None
+        pos += 1
+        current += 1
+
+    return pos if pos < len(mm) else None
+
+
+# Byte-order marks, longest first (the UTF-32 LE mark starts with the UTF-16 LE one)
+_BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+]
+
+# Encodings whose newline is not the single byte b"\n"
+_WIDE_ENCODINGS = {"utf-16-le": 2, "utf-16-be": 2, "utf-32-le": 4, "utf-32-be": 4}
+
+# (offset, magic bytes, description). Magics shorter than 4 bytes only name
+# the type of a file that already failed the text checks.
+_MAGIC_NUMBERS = [
+    (0, b"\x89PNG\r\n\x1a\n", "PNG image"),
+    (0, b"\xff\xd8\xff", "JPEG image"),
+    (0, b"GIF87a", "GIF image"),
+    (0, b"GIF89a", "GIF image"),
+    (0, b"BM", "BMP image"),
+    (0, b"%PDF-", "PDF document"),
+    (0, b"PK\x03\x04", "ZIP archive (also docx/xlsx/jar/whl)"),
+    (0, b"\x1f\x8b", "gzip archive"),
+    (0, b"BZh", "bzip2 archive"),
+    (0, b"\xfd7zXZ\x00", "xz archive"),
+    (0, b"7z\xbc\xaf\x27\x1c", "7-Zip archive"),
+    (0, b"Rar!\x1a\x07", "RAR archive"),
+    (0, b"\x28\xb5\x2f\xfd", "Zstandard archive"),
+    (257, b"ustar", "tar archive"),
+    (0, b"\x7fELF", "ELF executable"),
+    (0, b"MZ", "Windows executable"),
+    (0, b"\xcf\xfa\xed\xfe", "Mach-O executable"),
+    (0, b"\xca\xfe\xba\xbe", "Java class or Mach-O universal binary"),
+    (0, b"\x00asm", "WebAssembly module"),
+    (0, b"SQLite format 3\x00", "SQLite database"),
+    (0, b"PAR1", "Parquet file"),
+    (0, b"\x89HDF\r\n\x1a\n", "HDF5 file"),
+    (0, b"\x93NUMPY", "NumPy array"),
+    (0, b"ID3", "MP3 audio"),
+    (0, b"OggS", "Ogg media"),
+    (0, b"fLaC", "FLAC audio"),
+    (0, b"RIFF", "RIFF media (WAV/AVI/WebP)"),
+    (4, b"ftyp", "MP4/QuickTime media"),
+    (0, b"wOFF", "WOFF font"),
+    (0, b"wOF2", "WOFF2 font"),
+]
+
+# Bytes that do not occur in text (control characters except \t \n \f \r ESC etc.)
+_NON_TEXT_BYTES = bytes(b for b in range(256) if (b < 0x20 and b not in b"\a\b\t\n\f\r\x1b") or b == 0x7f)
+_TEXT_BYTES = bytes(b for b in range(256) if b not in _NON_TEXT_BYTES)
+
+
+def _sniff(head: bytes) -> Tuple[Optional[str], int, Optional[str]]:
+    """
+    Classify a file from its first block.
+
+    Args:
+        head: The first READ_SNIFF_BYTES bytes of the file
+
+    Returns:
+        (encoding, BOM length, binary type). For text the encoding is set
+        and the binary type is None; for binary data the encoding is None.
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding, len(bom), None
+
+    match = next(
+        ((magic, name) for offset, magic, name in _MAGIC_NUMBERS
+         if head[offset:offset + len(magic)] == magic),
+        None
+    )
+    non_text = len(head.translate(None, _TEXT_BYTES))
+    # Magic numbers of 4+ bytes are conclusive, except 4-byte printable
+    # ASCII ones (e.g. "RIFF", "OggS"), which plain text may start with:
+    # those only count if the block also has bytes that do not occur in text
+    if match and len(match[0]) >= 4:
+        word = len(match[0]) == 4 and match[0].isascii() and not match[0].translate(None, _TEXT_BYTES)
+        if not word or non_text:
+            return None, 0, match[1]
+    if b"\x00" in head or non_text > len(head) * 0.3:
+        return None, 0, match[1] if match else "unknown binary data"
+
+    for encoding in ["utf-8"] + READ_FALLBACK_ENCODINGS:
+        try:
+            # Not final: the block may end in the middle of a character
+            codecs.getincrementaldecoder(encoding)().decode(head, final=False)
+            return encoding, 0, None
+        except (UnicodeDecodeError, LookupError):
+            continue
+    # Mostly text with a few invalid bytes: show it with replacement characters
+    return "utf-8", 0, None
+
+
+def _binary_summary(file_path: str, size: int, file_type: str, head: bytes) -> str:
+    """Describe a binary file with its size, detected type and a hex preview"""
+    lines = [
+        f"Binary file: {file_path}",
+        f"Size: {size} bytes",
+        f"Type: {file_type}",
+        f"Hex preview (first {len(head)} bytes):",
+    ]
+    for pos in range(0, len(head), 16):
+        row = head[pos:pos + 16]
+        hex_part = " ".join(f"{b:02x}" for b in row)
+        text_part = "".join(chr(b) if 0x20 <= b < 0x7f else "." for b in row)
+        lines.append(f"{pos:08x}  {hex_part:<47}  |{text_part}|")
+    return "\n".join(lines)
+
+
+def _decode_window(data: bytes, at_start: bool, encoding: str = "utf-8") -> Tuple[str, int]:
     """
-    Read the contents of a file.
+    Decode a byte window of a text file.
+
+    Continuation bytes cut off at the head of a UTF-8 window and an
+    incomplete character at its tail are dropped, and invalid bytes are
+    replaced, instead of failing the whole read. Newlines are not
+    normalized (see _normalize_newlines).
+
+    Returns:
+        The text, and the number of bytes of `data` it covers (the
+        incomplete character at the tail is not covered, so the next
+        window can start at it)
+    """
+    skip = 0
+    if not at_start and encoding == "utf-8":
+        while skip < min(3, len(data)) and 0x80 <= data[skip] <= 0xBF:
+            skip += 1
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    text = decoder.decode(data[skip:], final=False)
+    return text, len(data) - len(decoder.getstate()[0])
+
+
+def _normalize_newlines(text: str) -> str:
+    """Match the newline handling of text-mode reads"""
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def _wide_line_window(
+    mm: mmap.mmap,
+    encoding: str,
+    bom_length: int,
+    start_line: int,
+    end_line: Optional[int],
+    max_chars: int
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Read a line window of a UTF-16/UTF-32 file by decoding it sequentially.
+
+    The byte-level line index cannot be used for these encodings, so the
+    file is decoded chunk by chunk until the window is complete.
+
+    Returns:
+        The window text (None if start_line is past the end of the file)
+        and, if the window was cut at max_chars, the read_file argument to
+        continue from: "start_line=N", or "offset=N" when not even the
+        first line fit
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    size = len(mm)
+    line = 1
+    parts: List[str] = []
+    chars = 0
+    pos = bom_length
+    # Byte offset of start_line, found while decoding
+    window_start = bom_length if start_line == 1 else None
+    while pos < size:
+        chunk_end = min(pos + _SCAN_CHUNK, size)
+        # Byte offset of the first character decoded from this chunk
+        text_start = pos - len(decoder.getstate()[0])
+        text = decoder.decode(mm[pos:chunk_end], final=chunk_end >= size)
+        pos = chunk_end
+        segments = text.split("\n")
+        for i, segment in enumerate(segments):
+            last = i == len(segments) - 1
+            if line >= start_line:
+                if window_start is None:
+                    # start_line begins after the newline ending segment i - 1
+                    window_start = text_start + len(("\n".join(segments[:i]) + "\n").encode(encoding))
+                piece = segment if last else segment + "\n"
+                if chars + len(piece) > max_chars:
+                    parts.append(piece[:max_chars - chars])
+                    if parts[-1].endswith("\n"):
+                        return "".join(parts), f"start_line={line + 1}"
+                    if line > start_line:
+                        return "".join(parts), f"start_line={line}"
+                    shown = "".join(parts).encode(encoding, errors="replace")
+                    return "".join(parts), f"offset={window_start + len(shown)}"
+                parts.append(piece)
+                chars += len(piece)
+            if not last:
+                line += 1
+                if end_line is not None and line > end_line:
+                    return "".join(parts), None
+    if line < start_line:
+        return None, None
+    return "".join(parts), None
+
+
+def read_file(
+    file_path: str,
+    offset: Optional[int] = None,
+    length: Optional[int] = None,
+    start_line: Optional[int] = None,
+    end_line: Optional[int] = None,
+    max_bytes: Optional[int] = None
+) -> str:
+    """
+    Read the contents of a file, or a window of it.
+
+    The file is memory-mapped, so reading a window of a huge file only
+    touches that window. Line windows use a sparse line-offset table that
+    is built lazily and cached per file.
+
+    The first block is sniffed before anything else is read: binary files
+    (NUL bytes, known magic numbers, mostly control bytes) get a short
+    summary with their type and a hex preview instead of their contents.
+    Text is decoded per window as UTF-8, or as the encoding given by its
+    BOM (UTF-8/16/32), or with the first of READ_FALLBACK_ENCODINGS that
+    decodes the first block; output stops at max_bytes or READ_MAX_CHARS.
 
     Args:
         file_path: Path to the file to read (absolute or relative)
+        offset: Byte offset to start reading from
+        length: Number of bytes to read from `offset`
+        start_line: First line to read (1-based, takes precedence over `offset`)
+        end_line: Last line to read (inclusive)
+        max_bytes: Maximum number of bytes to return (capped at READ_MAX_BYTES)
 
     Returns:
-        The contents of the file as a string
+        The contents of the file as a string, followed by a truncation
+        marker if the output was cut at a budget, or a summary of a binary
+        file
     """
     try:
         # Convert to Path object for better handling
         path = Path(file_path)
 
-        # Check if file exists
-        if not path.exists():
+        # Check if file exists (a single stat also serves the cache lookup)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
             return f"Error: File not found: {file_path}"
 
         # Check if it's actually a file (not a directory)
-        if not path.is_file():
+        if not stat.S_ISREG(st.st_mode):
             return f"Error: Path is not a file: {file_path}"
 
-        # Read the file
-        with open(path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        limit = READ_MAX_BYTES if max_bytes is None else max(1, min(max_bytes, READ_MAX_BYTES))
+        line_mode = start_line is not None or end_line is not None
+        if line_mode:
+            start_line = max(1, start_line or 1)
+            if end_line is not None and end_line < start_line:
+                return f"Error: end_line ({end_line}) is before start_line ({start_line})"
+
+        # Serve repeated reads of an unchanged file without opening it
+        cache_key = (
+            st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size,
+            offset, length, start_line, end_line, limit
+        )
+        cached = _read_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        with open(path, 'rb') as f:
+            opened_st = os.fstat(f.fileno())
+            size = opened_st.st_size
+            if size == 0:
+                return ""
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Sniff the first block before reading anything else
+                encoding, bom_length, binary_type = _sniff(mm[:READ_SNIFF_BYTES])
+                if binary_type is not None:
+                    content = _binary_summary(
+                        file_path, size, binary_type, mm[:READ_HEX_PREVIEW_BYTES]
+                    )
+                    cached_size = len(content)
+                elif line_mode and encoding in _WIDE_ENCODINGS:
+                    text, hint = _wide_line_window(
+                        mm, encoding, bom_length, start_line, end_line,
+                        min(READ_MAX_CHARS, limit // _WIDE_ENCODINGS[encoding])
+                    )
+                    if text is None:
+                        return f"Error: start_line {start_line} is past the end of the file: {file_path}"
+                    content = _normalize_newlines(text)
+                    if hint is not None:
+                        content += (
+                            f"\n\n[... truncated at {len(text)} characters. "
+                            f"Call read_file with {hint} to continue ...]"
+                        )
+                    cached_size = len(content)
+                else:
+                    # Resolve the requested window to a byte range
+                    if line_mode:
+                        index = _get_line_index(opened_st)
+                        start = _line_offset(mm, index, start_line)
+                        if start is None:
+                            return f"Error: start_line {start_line} is past the end of the file: {file_path}"
+                        end = size
+                        if end_line is not None:
+                            end = _line_offset(mm, index, end_line + 1)
+                            end = size if end is None else end
+                    else:
+                        start = min(max(0, offset or 0), size)
+                        end = size if length is None else min(size, start + max(0, length))
+                    start = max(start, bom_length)
+                    end = max(end, start)
+                    if encoding in _WIDE_ENCODINGS:
+                        # Keep windows aligned to whole code units
+                        unit = _WIDE_ENCODINGS[encoding]
+                        start -= (start - bom_length) % unit
+
+                    # Read the window, decoding only what fits the budgets
+                    shown_end = min(end, start + limit)
+                    data = mm[start:shown_end]
+                    text, covered = _decode_window(data, at_start=start == bom_length, encoding=encoding)
+                    if len(text) > READ_MAX_CHARS:
+                        text = text[:READ_MAX_CHARS]
+                        shown_end = start + len(text.encode(encoding, errors="replace"))
+                        data = data[:shown_end - start]
+                    elif shown_end < end and covered > 0:
+                        # Continue at the character cut by the budget, not after it
+                        shown_end = start + covered
+                        data = data[:covered]
+                    content = _normalize_newlines(text)
+
+                    if shown_end < end:
+                        lines_shown = data.count(b"\n")
+                        if line_mode and lines_shown:
+                            hint = f"start_line={start_line + lines_shown}"
+                        else:
+                            # No complete line fits: continue within the line
+                            hint = f"offset={shown_end}"
+                        content += (
+                            f"\n\n[... truncated: showing bytes {start}-{shown_end} of {size}. "
+                            f"Call read_file with {hint} to continue ...]"
+                        )
+                    cached_size = shown_end - start
+
+        # Only cache if the file did not change between stat and open
+        if (opened_st.st_mtime_ns, opened_st.st_size) == (st.st_mtime_ns, st.st_size):
+            _read_cache.put(cache_key, content, cached_size)
 
         return content
 
     except PermissionError:
         return f"Error: Permission denied to read file: {file_path}"
-    except UnicodeDecodeError:
-        return f"Error: File is not a text file or uses unsupported encoding: {file_path}"
     except Exception as e:
         return f"Error reading file: {str(e)}"
 
 
-def list_files(directory_path: str = ".") -> str:
+def _get_chunk_index(file_path: str) -> Union[ChunkIndex, str]:
+    """
+    Get the chunk index of a text file, building it if the file changed.
+
+    Returns:
+        The index, or a summary of the file if it is binary
+    """
+    with open(file_path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        key = (st.st_dev, st.st_ino)
+        version = (st.st_mtime_ns, st.st_size)
+        with _chunk_index_lock:
+            entry = _chunk_indexes.get(key)
+            if entry is not None and entry[0] == version:
+                _chunk_indexes.move_to_end(key)
+                return entry[1]
+
+        data = f.read()
+
+    encoding, bom_length, binary_type = _sniff(data[:READ_SNIFF_BYTES])
+    if binary_type is not None:
+        return _binary_summary(file_path, len(data), binary_type, data[:READ_HEX_PREVIEW_BYTES])
+    text, _ = _decode_window(data[bom_length:], at_start=True, encoding=encoding)
+    index = ChunkIndex(_normalize_newlines(text))
+
+    with _chunk_index_lock:
+        _chunk_indexes[key] = (version, index)
+        _chunk_indexes.move_to_end(key)
+        while len(_chunk_indexes) > CHUNK_INDEX_MAX_FILES:
+            _chunk_indexes.popitem(last=False)
+    return index
+
+
+def read_file_relevant(
+    file_path: str,
+    query: str,
+    top_k: Optional[int] = None,
+    max_tokens: Optional[int] = None
+) -> str:
+    """
+    Read only the parts of a file that are relevant to a question.
+
+    The file is split into chunks along its structure (paragraphs,
+    headings, code blocks, top-level definitions), the chunks are ranked
+    against the query with BM25, and the best ones are returned in file
+    order with their line ranges, within a token budget. The chunk index
+    is cached per file until the file's modification time or size changes.
+
+    Args:
+        file_path: Path to the file to read (absolute or relative)
+        query: The question or keywords to look for
+        top_k: Maximum number of chunks to return (default: RELEVANT_TOP_K)
+        max_tokens: Token budget of the returned text (default: RELEVANT_MAX_TOKENS)
+
+    Returns:
+        The most relevant chunks, each headed by its line range
+    """
+    if not query or not query.strip():
+        return "Error: Query is empty"
+
+    top_k = max(1, top_k or RELEVANT_TOP_K)
+    max_tokens = max(1, max_tokens or RELEVANT_MAX_TOKENS)
+
+    try:
+        path = Path(file_path)
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return f"Error: File not found: {file_path}"
+        if not stat.S_ISREG(st.st_mode):
+            return f"Error: Path is not a file: {file_path}"
+        if st.st_size > RELEVANT_MAX_FILE_BYTES:
+            return (
+                f"Error: File is too large to rank ({st.st_size} bytes, limit {RELEVANT_MAX_FILE_BYTES}): "
+                f"use search_files or read_file with a line window: {file_path}"
+            )
+
+        index = _get_chunk_index(file_path)
+        if isinstance(index, str):
+            return index
+
+        ranked = index.rank(query)
+        if not ranked:
+            return (
+                f"No part of {file_path} matches: {query}\n"
+                f"Try other keywords, or read_file with a line window"
+            )
+
+        # Take the best chunks that fit the budget; a chunk that does not
+        # fit is skipped in favour of smaller, lower-ranked ones
+        selected: List[Tuple[int, float, str]] = []
+        used = 0
+        for score, chunk in ranked:
+            if len(selected) >= top_k:
+                break
+            text = index.chunk_text(chunk)
+            cost = estimate_tokens(text) + 8
+            if used + cost > max_tokens:
+                if selected:
+                    continue
+                # Always return the start of the best chunk
+                lines = text.split("\n")
+                while len(lines) > 1 and estimate_tokens("\n".join(lines)) + 8 > max_tokens:
+                    lines.pop()
+                text = "\n".join(lines)
+                cost = max_tokens
+            selected.append((chunk, score, text))
+            used += cost
+
+        selected.sort()
+        blocks = []
+        for chunk, score, text in selected:
+            start = index.chunks[chunk][0] + 1
+            end = start + text.count("\n")
+            blocks.append(f"[lines {start}-{end}, score {score:.2f}]\n{text}")
+        header = (
+            f"{file_path}: {len(selected)} of {len(index.chunks)} chunks "
+            f"({len(ranked)} matching) for: {query}"
+        )
+        return header + "\n\n" + "\n\n".join(blocks)
+
+    except PermissionError:
+        return f"Error: Permission denied to read file: {file_path}"
+    except Exception as e:
+        return f"Error reading file: {str(e)}"
+
+
+def _share_budget(needs: List[int], budget: int) -> List[int]:
+    """
+    Split a byte budget fairly: files that need less than an equal share get
+    all they need, and what they leave is shared among the larger files.
+
+    Args:
+        needs: Bytes each file could use
+        budget: Total bytes to hand out
+
+    Returns:
+        Bytes allotted to each file, in the order of `needs`
+    """
+    shares = [0] * len(needs)
+    remaining = budget
+    order = sorted(range(len(needs)), key=lambda i: needs[i])
+    for position, i in enumerate(order):
+        shares[i] = min(needs[i], remaining // (len(order) - position))
+        remaining -= shares[i]
+    return shares
+
+
+def _as_paths(paths: Union[str, List[str], None]) -> List[str]:
+    """Normalize file paths given as a list or a single path (never split,
+    as file names may contain commas)"""
+    if not paths:
+        return []
+    if isinstance(paths, str):
+        paths = [paths]
+    return [p for p in paths if p]
+
+
+def _text_bytes(path: str) -> int:
+    """Bytes read_file could return for a file: 0 unless it is a readable
+    text file"""
+    try:
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            if not stat.S_ISREG(st.st_mode):
+                return 0
+            head = f.read(READ_SNIFF_BYTES)
+    except OSError:
+        return 0
+    _, bom_length, binary_type = _sniff(head)
+    if binary_type is not None:
+        return 0
+    return min(st.st_size - bom_length, READ_MAX_BYTES)
+
+
+def _get_read_files_executor() -> ThreadPoolExecutor:
+    """Get the thread pool used to read the files of a read_files call"""
+    global _read_files_executor
+    with _read_files_executor_lock:
+        if _read_files_executor is None:
+            _read_files_executor = ThreadPoolExecutor(
+                max_workers=READ_FILES_WORKERS,
+                thread_name_prefix="read-files"
+            )
+        return _read_files_executor
+
+
+def read_files(
+    file_paths: Union[str, List[str], None] = None,
+    pattern: Optional[str] = None,
+    max_bytes: Optional[int] = None
+) -> str:
+    """
+    Read several files in one call.
+
+    Files are read concurrently on a small thread pool, each through
+    read_file (sharing its cache, binary sniffing and decoding). One byte
+    budget is split across the files: small files are read whole and the
+    rest of the budget is shared equally among the larger ones, each of
+    which ends with read_file's truncation marker. A file that cannot be
+    read gets its error message in place of its contents.
+
+    Args:
+        file_paths: Paths of the files to read (a single path may be
+            given as a string)
+        pattern: Glob pattern of files to read, e.g. "config/*.yaml"
+            ("**" matches any number of directories)
+        max_bytes: Total bytes to return across all files (capped at
+            READ_FILES_MAX_BYTES)
+
+    Returns:
+        Each file's contents under a "=== path ===" header
+    """
+    paths = _as_paths(file_paths)
+    if pattern:
+        try:
+            paths.extend(sorted(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p)))
+        except Exception as e:
+            return f"Error: Invalid glob pattern {pattern!r}: {str(e)}"
+    if not paths:
+        if pattern:
+            return f"No files match: {pattern}"
+        return "Error: No files given: pass file_paths or a glob pattern"
+
+    # Read each file once, in the order given
+    seen = set()
+    unique = []
+    for path in paths:
+        real_path = os.path.realpath(path)
+        if real_path not in seen:
+            seen.add(real_path)
+            unique.append(path)
+    skipped = unique[READ_FILES_MAX_FILES:]
+    paths = unique[:READ_FILES_MAX_FILES]
+
+    budget = READ_FILES_MAX_BYTES if max_bytes is None else max(1, min(max_bytes, READ_FILES_MAX_BYTES))
+    # Only readable text files take a share of the budget; read_file
+    # reports errors and summarizes binary files on its own
+    executor = _get_read_files_executor()
+    shares = _share_budget(list(executor.map(_text_bytes, paths)), budget)
+    contents = list(executor.map(
+        lambda path, share: read_file(path, max_bytes=max(1, share)), paths, shares
+    ))
+
+    errors = sum(1 for content in contents if content.startswith("Error"))
+    header = f"{len(paths)} files read ({errors} errors), budget {budget} bytes"
+    if skipped:
+        header += f", {len(skipped)} more files not read"
+    sections = [header]
+    for path, content in zip(paths, contents):
+        sections.append(f"=== {path} ===\n{content}")
+    if skipped:
+        shown = ", ".join(skipped[:10]) + (", ..." if len(skipped) > 10 else "")
+        sections.append(
+            f"[... {len(skipped)} files over the limit of {READ_FILES_MAX_FILES} were not read: "
+            f"{shown}. Call read_files again with these paths ...]"
+        )
+    return "\n\n".join(sections)
+
+
+def _as_patterns(patterns: Union[str, List[str], None]) -> List[str]:
+    """Normalize glob patterns given as a list or a comma-separated string"""
+    if not patterns:
+        return []
+    if isinstance(patterns, str):
+        patterns = patterns.split(",")
+    return [p.strip() for p in patterns if p and p.strip()]
+
+
+def _matches_any(name: str, rel_path: str, patterns: List[str]) -> bool:
+    """Check an entry's name or relative path against glob patterns"""
+    return any(fnmatch(name, p) or fnmatch(rel_path, p) for p in patterns)
+
+
+def iter_directory(
+    directory: str,
+    max_depth: int = 1,
+    include: Optional[List[str]] = None,
+    exclude: Optional[List[str]] = None,
+    after: Optional[str] = None,
+    _prefix: str = "",
+    _depth: int = 1
+) -> Iterator[Tuple[str, os.DirEntry]]:
+    """
+    Lazily walk a directory with os.scandir, depth-first in name order.
+
+    Type checks reuse the file type cached on each DirEntry, so no stat call
+    is made unless the caller asks an entry for its size. Excluded
+    directories are not descended into; unreadable subdirectories are
+    skipped.
+
+    With `after`, the walk resumes behind that entry: directories that
+    come before it are neither listed nor descended into. os.scandir
+    cannot seek, so each directory on the way is still read in full, but
+    entries before `after` are dropped while reading and the rest are kept
+    in a heap and taken in name order as the walk goes, instead of being
+    sorted up front.
+
+    Args:
+        directory: Directory to walk
+        max_depth: Number of directory levels to walk (1 = direct children)
+        include: Glob patterns an entry must match to be yielded
+        exclude: Glob patterns of entries to skip entirely
+        after: Relative path of the last entry already listed
+
+    Yields:
+        (relative path, DirEntry) pairs
+    """
+    head, _, rest = (after or "").partition("/")
+    try:
+        with os.scandir(directory) as it:
+            # Names are unique, so entries are never compared
+            entries = [(entry.name, entry) for entry in it if entry.name >= head]
+    except OSError:
+        if _depth == 1:
+            raise
+        return
+    heapq.heapify(entries)
+
+    while entries:
+        name, entry = heapq.heappop(entries)
+        rel_path = _prefix + name
+        # The entry on the path to `after` was listed before its contents
+        resumed = bool(head) and name == head
+        if exclude and _matches_any(name, rel_path, exclude):
+            continue
+        if not resumed and (not include or _matches_any(name, rel_path, include)):
+            yield rel_path, entry
+        if _depth < max_depth and entry.is_dir(follow_symlinks=False):
+            yield from iter_directory(
+                entry.path, max_depth, include, exclude,
+                after=rest if resumed else None,
+                _prefix=rel_path + "/", _depth=_depth + 1
+            )
+
+
+def list_files(
+    directory_path: str = ".",
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    recursive: bool = False,
+    max_depth: Optional[int] = None,
+    include: Union[str, List[str], None] = None,
+    exclude: Union[str, List[str], None] = None
+) -> str:
     """
     List files in a directory.
 
+    Entries are streamed from os.scandir and the walk stops as soon as a
+    page is full, so large trees are never listed in full. The cursor is
+    the last path of the previous page, and the next page resumes behind
+    it without walking the earlier subtrees again (see iter_directory).
+
     Args:
         directory_path: Path to the directory to list (default: current directory)
+        limit: Maximum entries to return (capped at LIST_MAX_ENTRIES)
+        cursor: Cursor returned by a previous call (the last path listed),
+            to fetch the next page
+        recursive: List subdirectories as well
+        max_depth: Directory levels to walk when recursive (default: unlimited)
+        include: Glob patterns of entries to list (e.g. ["*.py"])
+        exclude: Glob patterns of entries to skip, directories included
 
     Returns:
         A list of files and directories as a formatted string
@@ -62,48 +993,286 @@ def list_files(directory_path: str = ".") -> str:
         if not path.is_dir():
             return f"Error: Path is not a directory: {directory_path}"
 
+        limit = LIST_MAX_ENTRIES if limit is None else max(1, min(limit, LIST_MAX_ENTRIES))
+        if recursive:
+            depth = max(1, max_depth) if max_depth is not None else sys.maxsize
+        else:
+            depth = 1
+
+        entries = iter_directory(
+            str(path), depth, _as_patterns(include), _as_patterns(exclude), after=cursor or None
+        )
+
         items = []
-        for item in sorted(path.iterdir()):
-            item_type = "DIR" if item.is_dir() else "FILE"
+        has_more = False
+        last_path = None
+        for rel_path, entry in entries:
+            if len(items) >= limit:
+                has_more = True
+                break
+            last_path = rel_path
+            item_type = "DIR" if entry.is_dir() else "FILE"
             size = ""
-            if item.is_file():
+            if entry.is_file():
                 try:
-                    size = f" ({item.stat().st_size} bytes)"
-                except:
+                    size = f" ({entry.stat().st_size} bytes)"
+                except OSError:
                     pass
-            items.append(f"[{item_type}] {item.name}{size}")
+            items.append(f"[{item_type}] {rel_path}{size}")
+
+        if not items:
+            return "No more entries" if cursor else "Directory is empty"
 
-        return "\n".join(items) if items else "Directory is empty"
+        if has_more:
+            items.append(
+                f"\n[... more entries: call list_files with cursor=\"{last_path}\" to continue ...]"
+            )
+
+        return "\n".join(items)
 
     except Exception as e:
         return f"Error listing directory: {str(e)}"
 
 
+def _get_search_index() -> SearchIndex:
+    """Get the shared search index, opening it on first use"""
+    global _search_index
+    with _search_index_lock:
+        if _search_index is None:
+            _search_index = SearchIndex(
+                SEARCH_ROOT,
+                SEARCH_INDEX_PATH,
+                max_file_bytes=SEARCH_MAX_FILE_BYTES,
+                refresh_interval=SEARCH_REFRESH_SECONDS
+            )
+        return _search_index
+
+
+def search_files(
+    query: str,
+    regex: bool = False,
+    ignore_case: bool = False,
+    include: Union[str, List[str], None] = None,
+    max_results: int = 50,
+    context_lines: int = 1
+) -> str:
+    """
+    Search file contents under SEARCH_ROOT.
+
+    Candidate files come from a persistent trigram index that is refreshed
+    incrementally, so only files that changed since the last refresh are
+    re-read for indexing.
+
+    Args:
+        query: Text to find, or a regular expression if `regex` is set
+        regex: Treat the query as a regular expression
+        ignore_case: Match case-insensitively
+        include: Glob patterns of relative paths to search (e.g. ["*.py"])
+        max_results: Maximum number of matching lines to return
+        context_lines: Lines of context to show around each match
+
+    Returns:
+        Matches as "path:line: text" with context lines as "path-line- text"
+    """
+    if not query:
+        return "Error: Query is empty"
+
+    try:
+        hits, truncated = _get_search_index().search(
+            query,
+            regex=regex,
+            ignore_case=ignore_case,
+            include=_as_patterns(include),
+            max_results=max(1, max_results),
+            context_lines=max(0, context_lines)
+        )
+    except re.error as e:
+        return f"Error: Invalid regular expression: {str(e)}"
+    except Exception as e:
+        return f"Error searching files: {str(e)}"
+
+    if not hits:
+        return f"No matches found for: {query}"
+
+    blocks = []
+    for rel_path, line_no, snippet in hits:
+        blocks.append("\n".join(
+            f"{rel_path}{':' if n == line_no else '-'}{n}{':' if n == line_no else '-'} {text}"
+            for n, text in snippet
+        ))
+    result = "\n--\n".join(blocks)
+
+    if truncated:
+        result += f"\n\n[... stopped after {len(hits)} matches: narrow the query or use include ...]"
+    return result
+
+
 # Tool registry for easy access
+# Optional keys per tool:
+#   "async": True if "function" is a coroutine function (default: run in the thread pool)
+#   "timeout": Seconds before the call is cancelled (default: TOOL_TIMEOUT)
+#   "speculative": False if the tool has side effects and must not start
+#                  before the model's response has finished (default: True)
 TOOLS = {
     "read_file": {
         "function": read_file,
-        "description": "Read the contents of a file",
+        "description": "Read the contents of a file, or a byte or line window of a large file",
         "parameters": {
             "type": "object",
             "properties": {
                 "file_path": {
                     "type": "string",
                     "description": "Path to the file to read (absolute or relative)"
+                },
+                "offset": {
+                    "type": "integer",
+                    "description": "Byte offset to start reading from (default: 0)"
+                },
+                "length": {
+                    "type": "integer",
+                    "description": "Number of bytes to read from offset (default: to the end)"
+                },
+                "start_line": {
+                    "type": "integer",
+                    "description": "First line to read, 1-based (takes precedence over offset)"
+                },
+                "end_line": {
+                    "type": "integer",
+                    "description": "Last line to read, inclusive (default: to the end)"
+                },
+                "max_bytes": {
+                    "type": "integer",
+                    "description": "Maximum bytes to return; longer output is truncated with a marker telling where to continue"
                 }
             },
             "required": ["file_path"]
         }
     },
+    "read_file_relevant": {
+        "function": read_file_relevant,
+        "description": (
+            "Read only the parts of a large file that are relevant to a question: "
+            "returns the best-matching chunks with their line numbers"
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "file_path": {
+                    "type": "string",
+                    "description": "Path to the file to read (absolute or relative)"
+                },
+                "query": {
+                    "type": "string",
+                    "description": "The user's question or keywords, in the language of the file"
+                },
+                "top_k": {
+                    "type": "integer",
+                    "description": "Maximum number of chunks to return (default: 5)"
+                },
+                "max_tokens": {
+                    "type": "integer",
+                    "description": "Token budget of the returned text (default: 2000)"
+                }
+            },
+            "required": ["file_path", "query"]
+        }
+    },
+    "read_files": {
+        "function": read_files,
+        "description": (
+            "Read several files in one call, given as a list of paths or a glob pattern; "
+            "one byte budget is shared across the files"
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "file_paths": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Paths of the files to read (absolute or relative)"
+                },
+                "pattern": {
+                    "type": "string",
+                    "description": "Glob pattern of files to read, e.g. \"config/*.yaml\" or \"src/**/*.py\""
+                },
+                "max_bytes": {
+                    "type": "integer",
+                    "description": "Total bytes to return across all files; larger files are truncated with a marker telling where to continue"
+                }
+            },
+            "required": []
+        }
+    },
+    "search_files": {
+        "function": search_files,
+        "description": "Search file contents for text or a regular expression and return file:line matches with context",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Text to find, or a regular expression if regex is true"
+                },
+                "regex": {
+                    "type": "boolean",
+                    "description": "Treat the query as a regular expression (default: false)"
+                },
+                "ignore_case": {
+                    "type": "boolean",
+                    "description": "Match case-insensitively (default: false)"
+                },
+                "include": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Glob patterns of relative paths to search, e.g. [\"*.py\"]"
+                },
+                "max_results": {
+                    "type": "integer",
+                    "description": "Maximum number of matching lines to return (default: 50)"
+                },
+                "context_lines": {
+                    "type": "integer",
+                    "description": "Lines of context around each match (default: 1)"
+                }
+            },
+            "required": ["query"]
+        }
+    },
     "list_files": {
         "function": list_files,
-        "description": "List files and directories in a given path",
+        "description": "List files and directories in a given path, optionally recursively and page by page",
         "parameters": {
             "type": "object",
             "properties": {
                 "directory_path": {
                     "type": "string",
                     "description": "Path to the directory to list (default: current directory)"
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum number of entries to return"
+                },
+                "cursor": {
+                    "type": "string",
+                    "description": "Cursor from a previous call to fetch the next page"
+                },
+                "recursive": {
+                    "type": "boolean",
+                    "description": "Also list the contents of subdirectories (default: false)"
+                },
+                "max_depth": {
+                    "type": "integer",
+                    "description": "Directory levels to walk when recursive (default: unlimited)"
+                },
+                "include": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Glob patterns of entries to list, e.g. [\"*.py\"]"
+                },
+                "exclude": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Glob patterns of entries to skip, e.g. [\".git\", \"node_modules\"]"
                 }
             },
             "required": []
@@ -149,11 +1318,100 @@ def call_tool(tool_name: str, arguments: Dict[str, Any]) -> str:
     if tool_name not in TOOLS:
         return f"Error: Unknown tool: {tool_name}"
 
+    started = time.perf_counter()
+    error_class = None
     try:
         tool_function = TOOLS[tool_name]["function"]
         result = tool_function(**arguments)
-        return result
     except TypeError as e:
-        return f"Error: Invalid arguments for {tool_name}: {str(e)}"
+        error_class = type(e).__name__
+        result = f"Error: Invalid arguments for {tool_name}: {str(e)}"
+    except Exception as e:
+        error_class = type(e).__name__
+        result = f"Error calling {tool_name}: {str(e)}"
+
+    _record_tool_call(tool_name, started, result, error_class)
+    return result
+
+
+def _record_tool_call(tool_name: str, started: float, result: Any, error_class: Optional[str]) -> None:
+    """Record a finished tool call, counting "Error: ..." results as tool errors"""
+    if error_class is None and isinstance(result, str) and result.startswith(("Error: ", "Error calling ")):
+        error_class = "ToolError"
+    metrics.record_tool_call(tool_name, time.perf_counter() - started, result, error_class)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the shared thread pool used to run synchronous tools"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=TOOL_WORKERS,
+            thread_name_prefix="mcp-tool"
+        )
+    return _executor
+
+
+async def acall_tool(
+    tool_name: str,
+    arguments: Dict[str, Any],
+    timeout: Optional[float] = None
+) -> str:
+    """
+    Call a tool by name without blocking the event loop.
+
+    Synchronous tools run on a bounded thread pool, async tools are awaited
+    directly. Cancelling the caller abandons the call; a synchronous tool
+    that already started finishes in its worker thread and its result is
+    discarded.
+
+    Args:
+        tool_name: Name of the tool to call
+        arguments: Arguments to pass to the tool
+        timeout: Seconds to wait for the result (default: the tool's own
+            "timeout" or TOOL_TIMEOUT)
+
+    Returns:
+        The result from the tool execution
+    """
+    if tool_name not in TOOLS:
+        return f"Error: Unknown tool: {tool_name}"
+
+    tool_def = TOOLS[tool_name]
+    if timeout is None:
+        timeout = tool_def.get("timeout", TOOL_TIMEOUT)
+
+    started = time.perf_counter()
+    error_class = None
+    try:
+        tool_function = tool_def["function"]
+        if tool_def.get("async", False):
+            pending = tool_function(**arguments)
+        else:
+            loop = asyncio.get_running_loop()
+            pending = loop.run_in_executor(
+                _get_executor(),
+                functools.partial(tool_function, **arguments)
+            )
+        # asyncio.wait leaves the tool's own exceptions (a socket timeout,
+        # say) in the task, so only an expired deadline reads as a timeout
+        task = asyncio.ensure_future(pending)
+        try:
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+        finally:
+            if not task.done():
+                task.cancel()
+        if done:
+            result = task.result()
+        else:
+            error_class = "TimeoutError"
+            result = f"Error: {tool_name} timed out after {timeout:g} seconds"
+    except TypeError as e:
+        error_class = type(e).__name__
+        result = f"Error: Invalid arguments for {tool_name}: {str(e)}"
     except Exception as e:
-        return f"Error calling {tool_name}: {str(e)}"
+        error_class = type(e).__name__
+        result = f"Error calling {tool_name}: {str(e)}"
+
+    _record_tool_call(tool_name, started, result, error_class)
+    return result
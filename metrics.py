@@ -0,0 +1,354 @@
+"""
+Metrics - Per-turn performance instrumentation
+Records LLM, tool and turn timings as Prometheus counters and histograms,
+served on a local HTTP endpoint, and optionally as OpenTelemetry spans
+"""
+import os
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Metrics settings
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))  # 0 disables the endpoint
+METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", "1.0"))
+OTEL_TRACES = os.getenv("OTEL_TRACES", "false").lower() in ("1", "true", "yes")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+class Gauge:
+    """Value that can go up and down, with labels"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Histogram with fixed buckets and labels"""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Iterable[str] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    labels = _format_labels(self.labelnames, key, f'le="{le}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {total[0]:g}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+# Exact counters (always recorded)
+LLM_REQUESTS = Counter("llm_requests_total", "LLM completion requests", ["model", "tier", "outcome"])
+LLM_TOKENS = Counter("llm_tokens_total", "Estimated LLM tokens", ["model", "direction"])
+TOOL_CALLS = Counter("tool_calls_total", "Tool calls", ["tool", "outcome"])
+TOOL_ERRORS = Counter("tool_errors_total", "Failed tool calls by error class", ["tool", "error_class"])
+TOOL_RESULT_BYTES = Counter("tool_result_bytes_total", "Bytes returned by tools", ["tool"])
+CHAT_TURNS = Counter("chat_turns_total", "Completed chat turns", ["outcome"])
+LLM_REJECTED = Counter("llm_rejected_total", "LLM requests rejected by the gateway", ["reason"])
+LLM_ESCALATIONS = Counter(
+    "llm_escalations_total", "Router rounds handed to the answer model", ["reason"]
+)
+PROMPT_TOKENS_SAVED = Counter(
+    "prompt_tokens_saved_total", "Estimated prompt tokens saved by deduplicated file reads"
+)
+
+# Gateway state
+LLM_IN_FLIGHT = Gauge("llm_in_flight", "LLM requests currently holding a gateway slot")
+LLM_QUEUE_DEPTH = Gauge("llm_queue_depth", "LLM requests waiting for a gateway slot")
+
+# Sampled histograms (recorded for METRICS_SAMPLE_RATE of the events)
+LLM_REQUEST_SECONDS = Histogram(
+    "llm_request_seconds", "Time from sending the request to the response stream opening", ["model", "tier"]
+)
+LLM_TTFT_SECONDS = Histogram(
+    "llm_time_to_first_token_seconds", "Time from sending the request to the first delta", ["model", "tier"]
+)
+LLM_STREAM_SECONDS = Histogram(
+    "llm_stream_seconds", "Time from the first to the last streamed delta", ["model", "tier"]
+)
+TOOL_SECONDS = Histogram("tool_duration_seconds", "Tool call duration", ["tool"])
+LLM_QUEUE_SECONDS = Histogram("llm_queue_seconds", "Time an LLM request waited for a gateway slot")
+CHAT_TURN_SECONDS = Histogram("chat_turn_seconds", "User message to final answer", [])
+CHAT_TURN_ROUNDS = Histogram(
+    "chat_turn_rounds", "LLM rounds per chat turn", [], buckets=(1, 2, 3, 4, 5, 6, 8, 10)
+)
+
+REGISTRY = [
+    LLM_REQUESTS, LLM_TOKENS, TOOL_CALLS, TOOL_ERRORS, TOOL_RESULT_BYTES, CHAT_TURNS,
+    LLM_REJECTED, LLM_ESCALATIONS, PROMPT_TOKENS_SAVED, LLM_IN_FLIGHT, LLM_QUEUE_DEPTH,
+    LLM_REQUEST_SECONDS, LLM_TTFT_SECONDS, LLM_STREAM_SECONDS, LLM_QUEUE_SECONDS,
+    TOOL_SECONDS, CHAT_TURN_SECONDS, CHAT_TURN_ROUNDS,
+]
+
+_tracer: Any = None
+_tracer_loaded = False
+_server: Optional[ThreadingHTTPServer] = None
+
+
+def should_sample() -> bool:
+    """Decide whether to record timings for one event"""
+    return METRICS_SAMPLE_RATE >= 1.0 or random.random() < METRICS_SAMPLE_RATE
+
+
+def _get_tracer() -> Any:
+    """Get the OpenTelemetry tracer if OTEL_TRACES is on and the API is installed"""
+    global _tracer, _tracer_loaded
+    if not _tracer_loaded:
+        _tracer_loaded = True
+        if OTEL_TRACES:
+            try:
+                from opentelemetry import trace
+                _tracer = trace.get_tracer("chainlit-mcp-agent")
+            except ImportError:
+                print("Warning: OTEL_TRACES is set but opentelemetry-api is not installed")
+    return _tracer
+
+
+def _emit_span(name: str, duration: float, attributes: Dict[str, Any], error_class: Optional[str]) -> None:
+    """Emit a finished span, back-dated by its duration"""
+    tracer = _get_tracer()
+    if tracer is None:
+        return
+    end_ns = time.time_ns()
+    span = tracer.start_span(
+        name,
+        start_time=end_ns - int(duration * 1e9),
+        attributes={k: v for k, v in attributes.items() if v is not None}
+    )
+    if error_class:
+        span.set_attribute("error.type", error_class)
+    span.end(end_time=end_ns)
+
+
+def record_llm_call(
+    model: str,
+    request_seconds: Optional[float],
+    ttft_seconds: Optional[float],
+    stream_seconds: Optional[float],
+    tokens_in: int,
+    tokens_out: int,
+    error_class: Optional[str] = None,
+    tier: str = "answer"
+) -> None:
+    """
+    Record one streamed LLM completion.
+
+    Args:
+        model: Model name
+        request_seconds: Time until the response stream opened (None if it never did)
+        ttft_seconds: Time until the first delta (None if there was none)
+        stream_seconds: Time from the first to the last delta
+        tokens_in: Estimated prompt tokens
+        tokens_out: Estimated completion tokens
+        error_class: Exception class name if the call failed
+        tier: Model tier that made the call ("router" or "answer")
+    """
+    LLM_REQUESTS.inc(model=model, tier=tier, outcome="error" if error_class else "ok")
+    LLM_TOKENS.inc(tokens_in, model=model, direction="in")
+    LLM_TOKENS.inc(tokens_out, model=model, direction="out")
+    if not should_sample():
+        return
+
+    if request_seconds is not None:
+        LLM_REQUEST_SECONDS.observe(request_seconds, model=model, tier=tier)
+    if ttft_seconds is not None:
+        LLM_TTFT_SECONDS.observe(ttft_seconds, model=model, tier=tier)
+    if stream_seconds is not None:
+        LLM_STREAM_SECONDS.observe(stream_seconds, model=model, tier=tier)
+    _emit_span(
+        "llm.chat_completion",
+        (ttft_seconds or request_seconds or 0.0) + (stream_seconds or 0.0),
+        {
+            "llm.model": model,
+            "llm.tier": tier,
+            "llm.request_seconds": request_seconds,
+            "llm.ttft_seconds": ttft_seconds,
+            "llm.stream_seconds": stream_seconds,
+            "llm.tokens_in": tokens_in,
+            "llm.tokens_out": tokens_out,
+        },
+        error_class
+    )
+
+
+def record_tool_call(tool: str, seconds: float, result: Any, error_class: Optional[str] = None) -> None:
+    """
+    Record one tool call.
+
+    Args:
+        tool: Tool name
+        seconds: Call duration
+        result: Tool result (its UTF-8 size is counted as bytes read)
+        error_class: Exception class name, or "ToolError" for an error result
+    """
+    result_bytes = len(result.encode("utf-8", "replace")) if isinstance(result, str) else 0
+    TOOL_CALLS.inc(tool=tool, outcome="error" if error_class else "ok")
+    TOOL_RESULT_BYTES.inc(result_bytes, tool=tool)
+    if error_class:
+        TOOL_ERRORS.inc(tool=tool, error_class=error_class)
+    if not should_sample():
+        return
+
+    TOOL_SECONDS.observe(seconds, tool=tool)
+    _emit_span(
+        "tool.call",
+        seconds,
+        {"tool.name": tool, "tool.result_bytes": result_bytes},
+        error_class
+    )
+
+
+def record_turn(seconds: float, rounds: int, error_class: Optional[str] = None) -> None:
+    """
+    Record one chat turn (user message to final answer).
+
+    Args:
+        seconds: Turn duration
+        rounds: LLM rounds the turn took
+        error_class: Exception class name if the turn failed
+    """
+    CHAT_TURNS.inc(outcome="error" if error_class else "ok")
+    if not should_sample():
+        return
+
+    CHAT_TURN_SECONDS.observe(seconds)
+    CHAT_TURN_ROUNDS.observe(rounds)
+    _emit_span("chat.turn", seconds, {"chat.rounds": rounds}, error_class)
+
+
+def render() -> str:
+    """
+    Render all metrics in the Prometheus text exposition format.
+
+    Returns:
+        Metrics text
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT) -> Optional[ThreadingHTTPServer]:
+    """
+    Serve /metrics on a background thread (once per process).
+
+    Args:
+        host: Address to bind
+        port: Port to bind (0 disables the endpoint)
+
+    Returns:
+        The running server, or None if disabled or the port is unavailable
+    """
+    global _server
+    if _server is not None or port <= 0:
+        return _server
+    try:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        print(f"Warning: metrics endpoint not started on {host}:{port}: {e}")
+        return None
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
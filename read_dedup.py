@@ -0,0 +1,195 @@
+"""
+Read Deduplication - Avoids repeating file contents within a conversation
+Replaces a repeated file read whose earlier result is still in the session's
+context with a short note, or with a diff when only part of it changed
+"""
+import os
+import json
+import difflib
+import hashlib
+from typing import Any, Dict, List, Set, Tuple
+
+import result_store
+from history import estimate_tokens
+
+# Deduplication settings
+READ_DEDUP = os.getenv("READ_DEDUP", "true").lower() in ("1", "true", "yes")
+
+# Shorter results are always repeated in full
+READ_DEDUP_MIN_CHARS = 500
+
+# A diff replaces the new result only if it is at most this fraction of its size
+READ_DIFF_MAX_RATIO = 0.5
+
+# Tools whose results are file contents
+DEDUP_TOOLS = {"read_file", "read_file_relevant", "read_files"}
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _fingerprint(message: Dict[str, Any]) -> str:
+    """Digest of the full content a tool message conveys (spilled or not)"""
+    spilled = message.get("spilled")
+    return spilled["digest"] if spilled else _digest(message.get("content") or "")
+
+
+def _present(messages: List[Dict[str, Any]]) -> Dict[str, str]:
+    """Fingerprints of the tool messages in a history, by tool call id"""
+    return {
+        message.get("tool_call_id"): _fingerprint(message)
+        for message in messages if message["role"] == "tool"
+    }
+
+
+class ReadTracker:
+    """
+    Per-session record of the file reads whose results are in the context.
+
+    Reads are keyed by tool, resolved path and window arguments, and
+    compared by content, so a file that was only touched still counts as
+    unchanged. A read is only deduplicated while the messages that carry
+    its earlier result are still in the history unchanged (not stubbed or
+    dropped by history compaction, which also stubs the notes pointing at
+    them).
+    """
+
+    def __init__(self):
+        self.turn = 0
+        self.saved_tokens = 0
+        # key -> latest read: its content digest, the turn it was conveyed
+        # in, and the (tool_call_id, fingerprint) of the messages conveying it
+        self._reads: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+
+    def _record(self, key: Tuple[str, str, str], digest: str, conveyed_by: List[Tuple[str, str]]) -> None:
+        self._reads[key] = {"digest": digest, "turn": self.turn, "messages": conveyed_by}
+
+    def new_turn(self) -> None:
+        """Start the next user turn"""
+        self.turn += 1
+
+    def dedupe(
+        self,
+        tool_call: Dict[str, Any],
+        message: Dict[str, Any],
+        messages: List[Dict[str, Any]],
+        refs: Set[str]
+    ) -> Dict[str, Any]:
+        """
+        Shorten a tool result that repeats a read already in the context.
+
+        The full result is kept in the result store, so a later change to
+        the file can be sent as a diff against it.
+
+        Args:
+            tool_call: The tool call (with normalized JSON arguments)
+            message: The tool message with the full result
+            messages: The session's history so far
+            refs: Digests referenced by the session (updated in place)
+
+        Returns:
+            The message to add to the history
+        """
+        name = tool_call["function"]["name"]
+        content = message.get("content") or ""
+        if not READ_DEDUP or name not in DEDUP_TOOLS or len(content) < READ_DEDUP_MIN_CHARS:
+            return message
+        if content.startswith("Error"):
+            return message
+
+        arguments = json.loads(tool_call["function"]["arguments"])
+        window = {k: v for k, v in arguments.items() if k != "file_path" and v is not None}
+        key = (
+            name,
+            os.path.realpath(str(arguments.get("file_path", ""))),
+            json.dumps(window, sort_keys=True)
+        )
+        digest = result_store.keep(content, refs)
+        previous = self._reads.get(key)
+        present = _present(messages)
+        if previous is None or any(present.get(i) != fp for i, fp in previous["messages"]):
+            # First read, or the earlier result is no longer in the context
+            self._record(key, digest, [(message["tool_call_id"], digest)])
+            return message
+
+        if previous["digest"] == digest:
+            note = (
+                f"[{name} result unchanged since turn {previous['turn']}: "
+                f"same {len(content)} characters as the earlier result for these arguments]"
+            )
+        else:
+            old = result_store.get_store().get(previous["digest"])
+            diff = "" if old is None else "".join(difflib.unified_diff(
+                old.splitlines(True), content.splitlines(True),
+                f"turn {previous['turn']}", "now", n=2
+            ))
+            if not diff or len(diff) > len(content) * READ_DIFF_MAX_RATIO:
+                self._record(key, digest, [(message["tool_call_id"], digest)])
+                return message
+            note = (
+                f"[{name} result changed since turn {previous['turn']}; "
+                f"unified diff against that result:]\n{diff}"
+            )
+            self._record(key, digest, previous["messages"] + [(message["tool_call_id"], _digest(note))])
+
+        return {
+            **message,
+            "content": note,
+            "reread": {
+                "of": previous["messages"],
+                "digest": digest,
+                "chars": len(content),
+                "tokens": estimate_tokens(content),
+            },
+        }
+
+    def live_digests(self, messages: List[Dict[str, Any]]) -> Set[str]:
+        """
+        Forget reads whose results are no longer in the history.
+
+        Args:
+            messages: The session's history
+
+        Returns:
+            Digests of the remaining reads' results (kept in the result
+            store for diffs)
+        """
+        present = _present(messages)
+        self._reads = {
+            key: read for key, read in self._reads.items()
+            if all(present.get(i) == fp for i, fp in read["messages"])
+        }
+        return {read["digest"] for read in self._reads.values()}
+
+    def record_savings(self, tokens: int) -> None:
+        """Count prompt tokens saved by one request"""
+        self.saved_tokens += tokens
+
+
+def restore(messages: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Prepare deduplicated reads for a prompt.
+
+    Notes and diffs are sent as they are: history compaction stubs a note
+    together with the earlier result it points at, so the result a note
+    refers to is always in the prompt.
+
+    Args:
+        messages: The session's (compacted) history
+
+    Returns:
+        The messages without deduplication metadata, and the estimated
+        prompt tokens saved
+    """
+    restored = []
+    saved = 0
+    for message in messages:
+        reread = message.get("reread")
+        if reread is None:
+            restored.append(message)
+            continue
+        message = {key: value for key, value in message.items() if key != "reread"}
+        saved += max(0, reread["tokens"] - estimate_tokens(message["content"]))
+        restored.append(message)
+    return restored, saved
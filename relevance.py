@@ -0,0 +1,186 @@
+"""
+Relevance - Lexical chunk ranking for query-aware file reads
+Splits a text file into structure-aware chunks and ranks them against a
+query with BM25, so only the relevant parts of a large file are returned
+"""
+import re
+import math
+from collections import Counter
+from typing import Dict, List, Tuple
+
+# Chunks longer than this are split into windows of at most this many
+# lines and characters (long chunks are hard to rank and costly to return)
+CHUNK_MAX_LINES = 40
+CHUNK_MAX_CHARS = 1000
+
+# Paragraphs shorter than this are merged into the next paragraph
+CHUNK_MIN_LINES = 3
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Lines that start a new chunk: Markdown headings, INI/TOML sections and
+# top-level definitions
+_HEADING_RE = re.compile(r"^(#{1,6}\s|\[\[?[^\]]+\]\]?\s*$|(async\s+def|def|class|function)\s)")
+
+_CODE_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+
+_WORD_RE = re.compile(r"\w+")
+_PART_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase search terms.
+
+    Identifiers are kept whole and also split into their snake_case and
+    camelCase parts, and words in non-Latin scripts (e.g. Korean) also
+    yield character bigrams, so "의존성은" still matches "의존성".
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        Terms in order of appearance
+    """
+    terms = []
+    for word in _WORD_RE.findall(text):
+        lower = word.lower()
+        terms.append(lower)
+        if word.isascii():
+            parts = _PART_RE.findall(word)
+            if len(parts) > 1:
+                terms.extend(part.lower() for part in parts)
+        elif len(word) > 2:
+            terms.extend(lower[i:i + 2] for i in range(len(lower) - 1))
+    return terms
+
+
+def split_chunks(lines: List[str], max_lines: int = CHUNK_MAX_LINES) -> List[Tuple[int, int]]:
+    """
+    Split lines into chunks along the structure of the text.
+
+    Blank lines end a paragraph (but not an indented block), headings and
+    top-level definitions start a new chunk, fenced code blocks are kept
+    whole where they fit, and very short paragraphs are merged into the
+    next one.
+
+    Args:
+        lines: Lines of the file, without newlines
+        max_lines: Maximum lines per chunk
+
+    Returns:
+        (start, end) line ranges, 0-based with an exclusive end
+    """
+    chunks: List[Tuple[int, int]] = []
+    start = None
+    in_fence = False
+
+    def close(end: int) -> None:
+        nonlocal start
+        if start is not None:
+            while end > start + 1 and not lines[end - 1].strip():
+                end -= 1
+            pos, chars = start, 0
+            for i in range(start, end):
+                chars += len(lines[i]) + 1
+                if i > pos and (i - pos >= max_lines or chars > CHUNK_MAX_CHARS):
+                    chunks.append((pos, i))
+                    pos, chars = i, len(lines[i]) + 1
+            chunks.append((pos, end))
+        start = None
+
+    for i, line in enumerate(lines):
+        if _CODE_FENCE_RE.match(line):
+            if not in_fence:
+                # Keep the text introducing a code block with the block
+                if start is not None and i - start >= max_lines:
+                    close(i)
+            in_fence = not in_fence
+        elif not in_fence:
+            if not line.strip():
+                # A blank line inside an indented block (e.g. a function
+                # body) does not end the chunk
+                indented = i + 1 < len(lines) and lines[i + 1][:1] in (" ", "\t")
+                if start is not None and i - start >= CHUNK_MIN_LINES and not indented:
+                    close(i)
+                continue
+            if _HEADING_RE.match(line):
+                close(i)
+        if start is None:
+            start = i
+    close(len(lines))
+    return chunks
+
+
+class ChunkIndex:
+    """
+    BM25 statistics over the chunks of one text.
+
+    Building the index tokenizes the whole text once; ranking a query only
+    touches the term frequencies of the chunks, so an index is worth
+    caching for as long as its file does not change.
+    """
+
+    def __init__(self, text: str, max_lines: int = CHUNK_MAX_LINES):
+        """
+        Chunk and index a text.
+
+        Args:
+            text: Decoded file contents with normalized newlines
+            max_lines: Maximum lines per chunk
+        """
+        self.lines = text.split("\n")
+        if self.lines and self.lines[-1] == "":
+            self.lines.pop()
+        self.chunks = split_chunks(self.lines, max_lines)
+        self.term_freqs: List[Dict[str, int]] = []
+        self.lengths: List[int] = []
+        self.doc_freq: Counter = Counter()
+        for start, end in self.chunks:
+            counts = Counter(tokenize("\n".join(self.lines[start:end])))
+            self.term_freqs.append(counts)
+            self.lengths.append(sum(counts.values()))
+            self.doc_freq.update(counts.keys())
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+    def chunk_text(self, chunk: int) -> str:
+        """Get the text of a chunk"""
+        start, end = self.chunks[chunk]
+        return "\n".join(self.lines[start:end])
+
+    def rank(self, query: str, k1: float = BM25_K1, b: float = BM25_B) -> List[Tuple[float, int]]:
+        """
+        Rank chunks against a query with BM25.
+
+        Args:
+            query: Free-text question or keywords
+            k1: Term frequency saturation
+            b: Chunk length normalization
+
+        Returns:
+            (score, chunk) pairs of matching chunks, best first
+        """
+        terms = set(tokenize(query))
+        total = len(self.chunks)
+        idf = {
+            term: math.log(1 + (total - self.doc_freq[term] + 0.5) / (self.doc_freq[term] + 0.5))
+            for term in terms if self.doc_freq[term]
+        }
+        if not idf:
+            return []
+
+        ranked = []
+        avg_length = self.avg_length or 1.0
+        for chunk, counts in enumerate(self.term_freqs):
+            score = 0.0
+            norm = k1 * (1 - b + b * self.lengths[chunk] / avg_length)
+            for term, weight in idf.items():
+                tf = counts.get(term)
+                if tf:
+                    score += weight * tf * (k1 + 1) / (tf + norm)
+            if score > 0:
+                ranked.append((score, chunk))
+        ranked.sort(key=lambda pair: (-pair[0], pair[1]))
+        return ranked
@@ -0,0 +1,230 @@
+"""
+Result Store - Content-addressed disk store for large tool results
+Keeps large tool results out of the in-memory session history: the history
+holds a short preview and a reference, and the full result is read back
+from disk only when a prompt is built
+"""
+import os
+import atexit
+import shutil
+import hashlib
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from history import estimate_tokens
+
+# Spill settings
+RESULT_SPILL_CHARS = int(os.getenv("RESULT_SPILL_CHARS", "2000"))
+RESULT_PREVIEW_CHARS = int(os.getenv("RESULT_PREVIEW_CHARS", "300"))
+RESULT_STORE_DIR = os.getenv("RESULT_STORE_DIR", "")
+
+
+class ResultStore:
+    """
+    Reference-counted store of texts, keyed by their SHA-256.
+
+    Identical results (e.g. the same file read by many sessions) are
+    stored once. Each holder takes a reference with put() and gives it
+    back with release(); a text is deleted when its last reference is
+    released. The store owns its directory, which is removed at exit.
+    """
+
+    def __init__(self, parent_dir: Optional[str] = None):
+        """
+        Create the store in a new private directory.
+
+        Args:
+            parent_dir: Directory to create the store in (default: the
+                system temp directory)
+        """
+        if parent_dir:
+            os.makedirs(parent_dir, exist_ok=True)
+        self.directory = tempfile.mkdtemp(prefix="tool-results-", dir=parent_dir or None)
+        self._refs: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        atexit.register(shutil.rmtree, self.directory, True)
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest[2:])
+
+    def put(self, text: str) -> str:
+        """
+        Store a text and take a reference to it.
+
+        Args:
+            text: Text to store
+
+        Returns:
+            The text's SHA-256 hex digest
+        """
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            count = self._refs.get(digest, 0)
+            if count == 0:
+                path = self._path(digest)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Write under a temporary name so a reader never sees a partial file
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            self._refs[digest] = count + 1
+        return digest
+
+    def get(self, digest: str) -> Optional[str]:
+        """
+        Read a stored text.
+
+        Args:
+            digest: Digest returned by put()
+
+        Returns:
+            The text, or None if it is no longer stored
+        """
+        try:
+            with open(self._path(digest), "rb") as f:
+                return f.read().decode("utf-8")
+        except FileNotFoundError:
+            return None
+
+    def release(self, digest: str) -> None:
+        """Give back a reference, deleting the text when it was the last one"""
+        with self._lock:
+            count = self._refs.get(digest, 0) - 1
+            if count > 0:
+                self._refs[digest] = count
+                return
+            self._refs.pop(digest, None)
+            try:
+                os.unlink(self._path(digest))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        """Get the number of stored texts and references"""
+        with self._lock:
+            return {"texts": len(self._refs), "references": sum(self._refs.values())}
+
+
+# Process-wide store, created on first use
+_store: Optional[ResultStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ResultStore:
+    """Get the shared result store, creating it on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultStore(RESULT_STORE_DIR)
+        return _store
+
+
+def keep(text: str, refs: Set[str]) -> str:
+    """
+    Store a text on behalf of a session, holding one reference per text.
+
+    Args:
+        text: Text to store
+        refs: Digests referenced by the session (updated in place)
+
+    Returns:
+        The text's digest
+    """
+    digest = get_store().put(text)
+    if digest in refs:
+        # The session already holds a reference to this text
+        get_store().release(digest)
+    refs.add(digest)
+    return digest
+
+
+def spill(message: Dict[str, Any], refs: Set[str]) -> Dict[str, Any]:
+    """
+    Move the content of a large tool message to the store.
+
+    The returned message holds a preview of the content and a "spilled"
+    entry with the digest, size and estimated tokens of the full content
+    (history.py budgets spilled messages by their full size). The
+    session's reference is recorded in `refs`.
+
+    Args:
+        message: Tool message in OpenAI format
+        refs: Digests referenced by the session (updated in place)
+
+    Returns:
+        The message to keep in the history (the input if it is small)
+    """
+    content = message.get("content") or ""
+    if RESULT_SPILL_CHARS <= 0 or len(content) <= RESULT_SPILL_CHARS:
+        return message
+
+    digest = keep(content, refs)
+    return {
+        **message,
+        "content": (
+            f"{content[:RESULT_PREVIEW_CHARS]}\n\n"
+            f"[... {len(content)} characters stored as {digest[:16]} ...]"
+        ),
+        "spilled": {"digest": digest, "chars": len(content), "tokens": estimate_tokens(content)},
+    }
+
+
+def resolve(messages: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Build a prompt from a history with spilled messages.
+
+    Args:
+        messages: Chat messages, possibly with spilled tool results
+
+    Returns:
+        Messages in OpenAI format with the full content loaded back
+    """
+    resolved = []
+    for message in messages:
+        spilled = message.get("spilled")
+        if spilled is None:
+            resolved.append(message)
+            continue
+        content = get_store().get(spilled["digest"])
+        if content is None:
+            content = (
+                message["content"]
+                + "\n[The full result is no longer stored. Call the tool again if it is needed.]"
+            )
+        message = {key: value for key, value in message.items() if key != "spilled"}
+        message["content"] = content
+        resolved.append(message)
+    return resolved
+
+
+def release_unreferenced(messages: Iterable[Dict[str, Any]], refs: Set[str], keep: Iterable[str] = ()) -> None:
+    """
+    Release the session's references to texts its history no longer uses
+    (e.g. results stubbed or dropped by history compaction).
+
+    Args:
+        messages: The session's history
+        refs: Digests referenced by the session (updated in place)
+        keep: Further digests the session still needs
+    """
+    referenced = set(keep)
+    referenced.update(m["spilled"]["digest"] for m in messages if m.get("spilled"))
+    unreferenced = refs - referenced
+    if not unreferenced:
+        return
+    store = get_store()
+    for digest in unreferenced:
+        store.release(digest)
+    refs.difference_update(unreferenced)
+
+
+def release_all(refs: Set[str]) -> None:
+    """Release every reference held by a session"""
+    if _store is None:
+        return
+    for digest in list(refs):
+        _store.release(digest)
+    refs.clear()
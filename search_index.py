@@ -0,0 +1,401 @@
+"""
+Search Index - Incremental trigram index for full-text file search
+Backs the search_files tool with a persistent SQLite inverted index
+"""
+import os
+import re
+import time
+import sqlite3
+import threading
+from array import array
+from collections import defaultdict
+from fnmatch import fnmatch
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import re._parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+# Directories that are never indexed
+DEFAULT_EXCLUDES = {".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv", ".mypy_cache"}
+
+# Bytes sniffed to detect binary files
+_BINARY_SNIFF_BYTES = 8192
+
+# Postings buffered in memory before they are merged into the index
+_POSTINGS_BATCH = 5000000
+
+# SQLite's default limit on bound parameters per statement
+_SQL_VARS = 900
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT UNIQUE NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    trigram INTEGER PRIMARY KEY,
+    file_ids BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _trigrams(data: bytes) -> set:
+    """Get the distinct case-folded trigrams of some bytes as integers"""
+    data = data.lower()
+    # Deduplicate with C-level zip before packing each trigram into an int
+    return {(a << 16) | (b << 8) | c for a, b, c in set(zip(data, data[1:], data[2:]))}
+
+
+def _unpack(packed: bytes) -> array:
+    """Decode a packed posting list"""
+    file_ids = array("I")
+    file_ids.frombytes(packed)
+    return file_ids
+
+
+def _literal_runs(pattern: str) -> List[str]:
+    """
+    Extract literal substrings every match of a regex must contain.
+
+    Only the top level of the pattern is inspected: consecutive literal
+    characters there are mandatory, anything else ends the current run.
+    Patterns with a top-level alternation yield no runs.
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return []
+
+    runs = []
+    current = []
+    for op, arg in parsed:
+        if op is sre_parse.LITERAL:
+            current.append(chr(arg))
+            continue
+        if op is sre_parse.BRANCH:
+            return []
+        if current:
+            runs.append("".join(current))
+            current = []
+    if current:
+        runs.append("".join(current))
+    return [run for run in runs if len(run.encode("utf-8")) >= 3]
+
+
+class SearchIndex:
+    """
+    Persistent trigram index over the files below a root directory.
+
+    Each trigram maps to a packed array of the ids of files containing it.
+    A refresh re-indexes only files whose mtime or size changed; replaced
+    files get a new id and their old id is left in the posting lists, where
+    the files table filters it out until the next compaction. Queries
+    narrow candidates with the index and verify them against the current
+    file contents.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        index_path: str,
+        max_file_bytes: int = 1024 * 1024,
+        refresh_interval: float = 30.0,
+        excludes: Optional[set] = None
+    ):
+        """
+        Initialize the search index.
+
+        Args:
+            root: Directory to index
+            index_path: SQLite file holding the index
+            max_file_bytes: Files larger than this are not indexed
+            refresh_interval: Minimum seconds between automatic refreshes
+            excludes: Directory and file names that are never indexed
+        """
+        self.root = os.path.abspath(root)
+        self.index_path = os.path.abspath(index_path)
+        self.max_file_bytes = max_file_bytes
+        self.refresh_interval = refresh_interval
+        self.excludes = DEFAULT_EXCLUDES if excludes is None else excludes
+        self._last_refresh = 0.0
+        self._refresh_lock = threading.Lock()
+        self._local = threading.local()
+
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        row = conn.execute("SELECT value FROM meta WHERE key = 'root'").fetchone()
+        if row is not None and row[0] != self.root:
+            # Index was built for another root: start over
+            conn.executescript("DELETE FROM postings; DELETE FROM files; DELETE FROM meta;")
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('root', ?)", (self.root,))
+        conn.commit()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection to the index database"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.index_path, timeout=30.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _walk(self) -> Iterator[Tuple[str, os.stat_result]]:
+        """Yield (relative path, stat) for every indexable file"""
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            try:
+                with os.scandir(directory) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name in self.excludes or entry.path == self.index_path:
+                    continue
+                if entry.name.startswith(os.path.basename(self.index_path)):
+                    continue  # WAL and shared-memory files of the index
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        if st.st_size <= self.max_file_bytes:
+                            yield os.path.relpath(entry.path, self.root), st
+                except OSError:
+                    continue
+
+    def _read_text(self, rel_path: str) -> Optional[bytes]:
+        """Read a file's bytes, or None if it is unreadable or binary"""
+        try:
+            with open(os.path.join(self.root, rel_path), "rb") as f:
+                data = f.read(self.max_file_bytes + 1)
+        except OSError:
+            return None
+        if len(data) > self.max_file_bytes or b"\0" in data[:_BINARY_SNIFF_BYTES]:
+            return None
+        return data
+
+    def refresh(self, force: bool = False) -> Dict[str, int]:
+        """
+        Bring the index up to date with the files on disk.
+
+        Args:
+            force: Refresh even if the last refresh is recent
+
+        Returns:
+            Counts of added, updated, removed and unchanged files
+        """
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        with self._refresh_lock:
+            if not force and time.monotonic() - self._last_refresh < self.refresh_interval:
+                return stats
+
+            conn = self._connect()
+            known = {
+                path: (file_id, mtime_ns, size)
+                for file_id, path, mtime_ns, size in conn.execute(
+                    "SELECT id, path, mtime_ns, size FROM files"
+                )
+            }
+
+            pending = defaultdict(lambda: array("I"))
+            buffered = 0
+            with conn:
+                for rel_path, st in self._walk():
+                    current = known.pop(rel_path, None)
+                    if current is not None:
+                        if current[1:] == (st.st_mtime_ns, st.st_size):
+                            stats["unchanged"] += 1
+                            continue
+                        conn.execute("DELETE FROM files WHERE id = ?", (current[0],))
+                        stats["updated"] += 1
+                    else:
+                        stats["added"] += 1
+
+                    # Binary files are recorded without postings so they
+                    # are not re-read on every refresh
+                    cursor = conn.execute(
+                        "INSERT INTO files (path, mtime_ns, size) VALUES (?, ?, ?)",
+                        (rel_path, st.st_mtime_ns, st.st_size)
+                    )
+                    file_id = cursor.lastrowid
+                    data = self._read_text(rel_path)
+                    if data is None:
+                        continue
+                    trigrams = _trigrams(data)
+                    for trigram in trigrams:
+                        pending[trigram].append(file_id)
+                    buffered += len(trigrams)
+                    if buffered >= _POSTINGS_BATCH:
+                        self._flush_postings(conn, pending)
+                        buffered = 0
+
+                self._flush_postings(conn, pending)
+
+                # Files that disappeared
+                for file_id, _, _ in known.values():
+                    conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+                stats["removed"] = len(known)
+
+                self._maybe_compact(conn, stats["updated"] + stats["removed"])
+
+            self._last_refresh = time.monotonic()
+        return stats
+
+    def _load_postings(self, conn: sqlite3.Connection, trigrams: List[int]) -> Dict[int, bytes]:
+        """Get the packed posting lists of some trigrams"""
+        postings = {}
+        for i in range(0, len(trigrams), _SQL_VARS):
+            chunk = trigrams[i:i + _SQL_VARS]
+            postings.update(conn.execute(
+                f"SELECT trigram, file_ids FROM postings WHERE trigram IN ({','.join('?' * len(chunk))})",
+                chunk
+            ))
+        return postings
+
+    def _flush_postings(self, conn: sqlite3.Connection, pending: Dict[int, array]) -> None:
+        """Append buffered file ids to their posting lists"""
+        existing = self._load_postings(conn, list(pending))
+        conn.executemany(
+            "INSERT OR REPLACE INTO postings VALUES (?, ?)",
+            (
+                (trigram, existing.get(trigram, b"") + file_ids.tobytes())
+                for trigram, file_ids in pending.items()
+            )
+        )
+        pending.clear()
+
+    def _maybe_compact(self, conn: sqlite3.Connection, replaced: int) -> None:
+        """Drop postings of replaced files once they make up a fifth of the index"""
+        row = conn.execute("SELECT value FROM meta WHERE key = 'stale_files'").fetchone()
+        stale = (int(row[0]) if row else 0) + replaced
+        live = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        if stale and stale * 5 >= max(live, 1):
+            live_ids = {row[0] for row in conn.execute("SELECT id FROM files")}
+            rows = []
+            for trigram, packed in conn.execute("SELECT trigram, file_ids FROM postings").fetchall():
+                file_ids = array("I", (i for i in _unpack(packed) if i in live_ids))
+                rows.append((trigram, file_ids.tobytes()))
+            conn.execute("DELETE FROM postings")
+            conn.executemany(
+                "INSERT INTO postings VALUES (?, ?)",
+                (row for row in rows if row[1])
+            )
+            stale = 0
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('stale_files', ?)", (str(stale),))
+
+    def candidates(self, literals: List[str]) -> List[str]:
+        """
+        Get the files that contain every trigram of the given literals.
+
+        Args:
+            literals: Substrings every match must contain (empty for all files)
+
+        Returns:
+            Relative paths of candidate files, sorted
+        """
+        trigrams = set()
+        for literal in literals:
+            trigrams |= _trigrams(literal.encode("utf-8"))
+
+        conn = self._connect()
+        if not trigrams:
+            return [row[0] for row in conn.execute("SELECT path FROM files ORDER BY path")]
+
+        postings = self._load_postings(conn, list(trigrams))
+        if len(postings) < len(trigrams):
+            return []
+
+        # Intersect starting from the rarest trigram
+        lists = sorted(postings.values(), key=len)
+        file_ids = set(_unpack(lists[0]))
+        for packed in lists[1:]:
+            if not file_ids:
+                return []
+            file_ids.intersection_update(_unpack(packed))
+
+        # Ids of replaced files no longer match a row in the files table
+        paths = []
+        file_ids = list(file_ids)
+        for i in range(0, len(file_ids), _SQL_VARS):
+            chunk = file_ids[i:i + _SQL_VARS]
+            paths.extend(row[0] for row in conn.execute(
+                f"SELECT path FROM files WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk
+            ))
+        return sorted(paths)
+
+    def search(
+        self,
+        query: str,
+        regex: bool = False,
+        ignore_case: bool = False,
+        include: Optional[List[str]] = None,
+        max_results: int = 50,
+        context_lines: int = 1
+    ) -> Tuple[List[Tuple[str, int, List[Tuple[int, str]]]], bool]:
+        """
+        Search the indexed files.
+
+        Args:
+            query: Literal text or regular expression to find
+            regex: Treat the query as a regular expression
+            ignore_case: Match case-insensitively
+            include: Glob patterns the relative path must match
+            max_results: Maximum number of matching lines to return
+            context_lines: Lines of context around each match
+
+        Returns:
+            (hits, truncated) where each hit is (path, line number,
+            [(line number, text), ...] including context)
+        """
+        self.refresh()
+
+        flags = re.IGNORECASE if ignore_case else 0
+        if regex:
+            compiled = re.compile(query, flags | re.MULTILINE)
+            literals = _literal_runs(query)
+        else:
+            compiled = re.compile(re.escape(query), flags)
+            literals = [query]
+
+        hits = []
+        for rel_path in self.candidates(literals):
+            if include and not any(fnmatch(rel_path, p) for p in include):
+                continue
+            data = self._read_text(rel_path)
+            if data is None:
+                continue
+            text = data.decode("utf-8", errors="replace")
+
+            lines = None
+            line_no, pos, last_hit_line = 1, 0, 0
+            for match in compiled.finditer(text):
+                line_no += text.count("\n", pos, match.start())
+                pos = match.start()
+                if line_no == last_hit_line:
+                    continue
+                last_hit_line = line_no
+                if lines is None:
+                    # Split on "\n" only, as line_no counts (splitlines()
+                    # also breaks at "\r", "\x0c", "\u2028", ...)
+                    lines = [line.rstrip("\r") for line in text.split("\n")]
+                    if len(lines) > 1 and lines[-1] == "":
+                        lines.pop()
+                first = max(1, line_no - context_lines)
+                last = min(len(lines), line_no + context_lines)
+                snippet = [(n, lines[n - 1]) for n in range(first, last + 1)]
+                hits.append((rel_path, line_no, snippet))
+                if len(hits) >= max_results:
+                    return hits, True
+
+        return hits, False
@@ -0,0 +1,89 @@
+"""
+Token Streaming - Coalesced token streaming to the Chainlit UI
+Buffers streamed deltas and sends them in batches instead of one frame per token
+"""
+import os
+import time
+import asyncio
+from typing import Any, List, Optional
+
+# Streaming settings (0 ms sends every token as it arrives)
+STREAM_FLUSH_INTERVAL_MS = float(os.getenv("STREAM_FLUSH_INTERVAL_MS", "40"))
+STREAM_FLUSH_CHARS = int(os.getenv("STREAM_FLUSH_CHARS", "256"))
+
+
+class StreamCoalescer:
+    """
+    Coalesce streamed tokens into fewer `stream_token` calls.
+
+    Tokens are buffered and sent as one chunk when the buffer is older than
+    the flush interval or larger than the size threshold. A timer flushes
+    the buffer when the stream pauses, so text never waits for the next
+    token. Call flush() at the end of the stream.
+    """
+
+    def __init__(
+        self,
+        msg: Any,
+        interval_ms: float = STREAM_FLUSH_INTERVAL_MS,
+        max_chars: int = STREAM_FLUSH_CHARS
+    ):
+        """
+        Initialize the coalescer.
+
+        Args:
+            msg: Message that receives the tokens (anything with stream_token)
+            interval_ms: Maximum time a token waits in the buffer
+            max_chars: Buffer size that triggers an immediate flush
+        """
+        self.msg = msg
+        self.interval = interval_ms / 1000
+        self.max_chars = max_chars
+        self.frames = 0
+        self._buffer: List[str] = []
+        self._size = 0
+        self._started = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Keeps chunks in order when a timer flush overlaps a regular one
+        self._lock = asyncio.Lock()
+
+    async def push(self, token: str) -> None:
+        """
+        Add a streamed token, flushing if the window is full.
+
+        Args:
+            token: Streamed text delta
+        """
+        if not token:
+            return
+        if not self._buffer:
+            self._started = time.monotonic()
+        self._buffer.append(token)
+        self._size += len(token)
+
+        if (
+            self.interval <= 0
+            or self._size >= self.max_chars
+            or time.monotonic() - self._started >= self.interval
+        ):
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.interval, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        asyncio.ensure_future(self.flush())
+
+    async def flush(self) -> None:
+        """Send everything buffered so far as one chunk"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._lock:
+            if not self._buffer:
+                return
+            text = "".join(self._buffer)
+            self._buffer = []
+            self._size = 0
+            self.frames += 1
+            await self.msg.stream_token(text)
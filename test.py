@@ -1,89 +1,111 @@
+import os
 import chainlit as cl
-from contextlib import AsyncExitStack
-from langgraph.prebuilt import create_react_agent
-from langchain_core.runnables import RunnableConfig
-from langchain_core.messages import SystemMessage
-from langchain_openai import ChatOpenAI
-from langchain_mcp_adapters.tool import load_mcp_tools
 from mcp import StdioServerParameters
-from mcp.client.stdio import stdio_client
-from mcp import ClientSession
+from mcp_pool import MCPServerPool
+
+# langgraph, langchain_core, langchain_openai는 Agent를 만들 때 처음 import
+# 역할: 워커 시작 시간에서 무거운 import를 뺌 (benchmarks/bench_startup.py)
 
 # ============================================
-# 1. 채팅 시작 시 - 초기화 단계
+# 0. 프로세스 전체에서 공유하는 MCP 서버 풀
 # ============================================
-@cl.on_chat_start
-async def on_chat_start():
+# 역할: 여러 MCP 서버를 이름별로 정의
+SERVERS = {
+    "fetch": StdioServerParameters(
+        command="uvx",
+        args=["mcp-server-fetch"],
+        env=None
+    ),
+    "filesystem": StdioServerParameters(
+        command="uvx",
+        args=["mcp-server-filesystem"],
+        env=None
+    ),
+    # 필요한 만큼 추가 가능
+    # "sqlite": StdioServerParameters(
+    #     command="uvx",
+    #     args=["mcp-server-sqlite"],
+    #     env=None
+    # ),
+}
+
+# 역할: 서버마다 프로세스를 한 번(또는 N개 복제본)만 띄우고,
+#       초기화된 세션과 tools를 모든 채팅 세션이 함께 사용
+# - 모든 서버는 동시에 시작
+# - required 서버만 기다리고(서버별 타임아웃), 나머지는 준비되는 대로 tools 추가
+# - 시작에 실패한 서버는 경고만 남기고 건너뜀
+mcp_pool = MCPServerPool(
+    SERVERS,
+    replicas=int(os.getenv("MCP_POOL_REPLICAS", "1")),
+    required=["filesystem"],
+    startup_timeout=float(os.getenv("MCP_STARTUP_TIMEOUT", "30"))
+)
+
+
+def build_agent():
     """
-    사용자가 채팅을 시작할 때 한 번만 실행
-    역할: 여러 MCP 서버 연결 + Agent 생성 + 세션에 저장
+    현재 풀에 붙어 있는 tools로 Agent 생성
+    역할: 늦게 준비된 서버의 tools도 다음 메시지부터 사용할 수 있도록 다시 호출됨
     """
-    
-    # 1-1. AsyncExitStack 생성
-    stack = AsyncExitStack()
-    
-    # 1-2. 여러 MCP 서버 파라미터 설정
-    # 역할: 여러 MCP 서버를 리스트로 정의
-    servers = [
-        StdioServerParameters(
-            command="uvx",
-            args=["mcp-server-fetch"],
-            env=None
-        ),
-        StdioServerParameters(
-            command="uvx",
-            args=["mcp-server-filesystem"],
-            env=None
-        ),
-        # 필요한 만큼 추가 가능
-        # StdioServerParameters(
-        #     command="uvx",
-        #     args=["mcp-server-sqlite"],
-        #     env=None
-        # ),
-    ]
-    
-    # 1-3. 모든 서버에서 tools 수집
-    # 역할: 각 서버에 연결하고 모든 tools를 하나의 리스트로 통합
-    all_tools = []
-    
-    for server_params in servers:
-        # 1-3-1. stdio_client로 서버 프로세스 실행 및 파이프 연결
-        read, write = await stack.enter_async_context(
-            stdio_client(server_params)
-        )
-        
-        # 1-3-2. ClientSession 생성 및 초기화
-        session = await stack.enter_async_context(
-            ClientSession(read, write)
-        )
-        await session.initialize()
-        
-        # 1-3-3. 이 서버의 tools를 LangChain Tools로 변환
-        tools = await load_mcp_tools(session)
-        
-        # 1-3-4. 전체 tools 리스트에 추가
-        all_tools.extend(tools)
-    
-    # 1-4. LLM 생성
+    from langgraph.prebuilt import create_react_agent
+    from langchain_core.messages import SystemMessage
+    from langchain_openai import ChatOpenAI
+
+    # LLM 생성
     llm = ChatOpenAI(model="gpt-4")
-    
-    # 1-5. 시스템 프롬프트 설정
+
+    # 시스템 프롬프트 설정
     system_prompt = SystemMessage(
         content="당신은 친절한 AI 어시스턴트입니다. 한국어로 답변해주세요."
     )
-    
-    # 1-6. ReAct Agent 생성 (모든 서버의 tools 사용)
+
+    # ReAct Agent 생성 (모든 서버의 tools 사용)
     # 역할: 여러 MCP 서버의 모든 tools를 하나의 Agent에 통합
     agent = create_react_agent(
         llm,
-        all_tools,  # 모든 서버의 tools
+        mcp_pool.get_tools(),  # 모든 서버의 tools
         prompt=system_prompt
     )
-    
-    # 1-7. 세션에 저장
+
+    # 세션에 저장 (어떤 tools 버전으로 만들었는지 함께 기록)
     cl.user_session.set("agent", agent)
-    cl.user_session.set("stack", stack)
+    cl.user_session.set("tools_version", mcp_pool.tools_version)
+
+
+@cl.on_app_startup
+async def on_app_startup():
+    """
+    앱이 시작될 때 한 번만 실행
+    역할: 첫 채팅 전에 MCP 서버 풀을 미리 띄워 둠
+    """
+    await mcp_pool.start()
+
+
+@cl.on_app_shutdown
+async def on_app_shutdown():
+    """
+    앱이 종료될 때 한 번만 실행
+    역할: 풀의 모든 MCP 서버 프로세스 정리
+    """
+    await mcp_pool.close()
+
+
+# ============================================
+# 1. 채팅 시작 시 - 초기화 단계
+# ============================================
+@cl.on_chat_start
+async def on_chat_start():
+    """
+    사용자가 채팅을 시작할 때 한 번만 실행
+    역할: 공유 풀의 tools로 Agent 생성 + 세션에 저장
+    """
+
+    # 1-1. required 서버가 준비될 때까지 대기 (이미 준비됐다면 바로 반환)
+    # 역할: 채팅마다 서버 프로세스를 새로 띄우지 않음
+    await mcp_pool.start()
+
+    # 1-2. 지금까지 준비된 tools로 Agent 생성 + 세션에 저장
+    build_agent()
 
 
 # ============================================
@@ -96,8 +118,14 @@ async def on_message(message: cl.Message):
     역할: Agent 실행 + 응답 전송
     """
     
+    # 채팅 시작 후 새로 준비된 서버가 있으면 Agent를 다시 생성
+    if cl.user_session.get("tools_version") != mcp_pool.tools_version:
+        build_agent()
+
     agent = cl.user_session.get("agent")
     
+    # build_agent()에서 이미 import된 상태
+    from langchain_core.runnables import RunnableConfig
     config = RunnableConfig(
         callbacks=[cl.LangchainCallbackHandler()],
         recursion_limit=100
@@ -109,20 +137,3 @@ async def on_message(message: cl.Message):
     )
     
     await cl.Message(content=response["messages"][-1].content).send()
-
-
-# ============================================
-# 3. 채팅 종료 시 - 정리 단계
-# ============================================
-@cl.on_chat_end
-async def on_chat_end():
-    """
-    사용자가 채팅을 종료할 때 실행
-    역할: 모든 MCP 서버 연결 정리
-    """
-    
-    stack = cl.user_session.get("stack")
-    
-    # 역할: 모든 서버의 연결을 역순으로 종료
-    if stack:
-        await stack.aclose()